@@ -1,5 +1,5 @@
 from django.contrib import admin
-from accounts.models import CustomUser, UserProfile
+from accounts.models import CustomUser, UserProfile, QueuedEmail
 
 # Register your models here.
-admin.site.register([CustomUser, UserProfile])
+admin.site.register([CustomUser, UserProfile, QueuedEmail])
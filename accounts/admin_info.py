@@ -0,0 +1,188 @@
+# accounts/admin_info.py
+
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, post_delete
+
+from institutions.models import Institution, School, Department
+
+
+ADMIN_INFO_VERSION_KEY = 'admin-info-version'
+
+
+def _cache_key(user_id, version):
+    return f'admin-info:{version}:{user_id}'
+
+
+def compute_admin_info_many(user_ids):
+    """
+    Build the admin info of several users with one query per admin level.
+
+    Args:
+        user_ids (iterable): The ids of the users.
+
+    Returns:
+        dict: The admin info of each user (see compute_admin_info), keyed by user id.
+    """
+    admin_info = {user_id: {} for user_id in user_ids}
+
+    institutions = Institution.objects.filter(admins__in=list(admin_info)).values('name', user_id=F('admins'))
+    schools = School.objects.filter(admins__in=list(admin_info)).values(
+        'name',
+        user_id=F('admins'),
+        institution_name=F('institution__name'),
+    )
+    departments = Department.objects.filter(admins__in=list(admin_info)).values(
+        'name',
+        user_id=F('admins'),
+        school_name=F('school__name'),
+        institution_name=F('school__institution__name'),
+    )
+
+    for entity in institutions:
+        admin_info[entity['user_id']].setdefault('institution_level', []).append({'name': entity['name']})
+    for entity in schools:
+        admin_info[entity['user_id']].setdefault('school_level', []).append(
+            {'name': entity['name'], 'institution': entity['institution_name']}
+        )
+    for entity in departments:
+        admin_info[entity['user_id']].setdefault('department_level', []).append(
+            {'name': entity['name'], 'school': entity['school_name'], 'institution': entity['institution_name']}
+        )
+
+    return admin_info
+
+
+def compute_admin_info(user_id):
+    """
+    Build the admin info of a user with one query per admin level.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        dict: The institutions, schools and departments the user is an admin of, keyed by admin level.
+    """
+    return compute_admin_info_many([user_id])[user_id]
+
+
+def get_admin_info(user_id):
+    """
+    Get the admin info of a user, computing and caching it on a cache miss.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        dict: The admin info of the user.
+    """
+    version = cache.get_or_set(ADMIN_INFO_VERSION_KEY, 0, timeout=None)
+    key = _cache_key(user_id, version)
+    admin_info = cache.get(key)
+    if admin_info is None:
+        admin_info = compute_admin_info(user_id)
+        cache.set(key, admin_info)
+    return admin_info
+
+
+def get_admin_info_many(user_ids):
+    """
+    Get the admin info of several users with one cache lookup, computing and caching the misses together.
+
+    Args:
+        user_ids (iterable): The ids of the users.
+
+    Returns:
+        dict: The admin info of each user, keyed by user id.
+    """
+    version = cache.get_or_set(ADMIN_INFO_VERSION_KEY, 0, timeout=None)
+    keys = {user_id: _cache_key(user_id, version) for user_id in user_ids}
+    cached = cache.get_many(keys.values())
+    admin_info = {user_id: cached[key] for user_id, key in keys.items() if key in cached}
+
+    missing = [user_id for user_id in keys if user_id not in admin_info]
+    if missing:
+        computed = compute_admin_info_many(missing)
+        cache.set_many({keys[user_id]: info for user_id, info in computed.items()})
+        admin_info.update(computed)
+    return admin_info
+
+
+class AdminInfoBatch:
+    """
+    Admin info lookups deferred while many rows are serialized, and loaded together afterwards.
+
+    get() hands out an empty dict per lookup, and load() fills them all in place with get_admin_info_many(),
+    so the serialized data is complete once load() returns.
+    """
+
+    def __init__(self):
+        self.pending = {}
+
+    def get(self, user_id):
+        admin_info = {}
+        self.pending.setdefault(user_id, []).append(admin_info)
+        return admin_info
+
+    def load(self):
+        if not self.pending:
+            return
+        for user_id, info in get_admin_info_many(self.pending).items():
+            for admin_info in self.pending[user_id]:
+                admin_info.update(info)
+        self.pending = {}
+
+
+def invalidate_admin_info(user_ids):
+    """
+    Remove the cached admin info of the given users.
+
+    Args:
+        user_ids (iterable): The ids of the users.
+    """
+    version = cache.get_or_set(ADMIN_INFO_VERSION_KEY, 0, timeout=None)
+    cache.delete_many([_cache_key(user_id, version) for user_id in user_ids])
+
+
+def invalidate_all_admin_info():
+    """
+    Invalidate the cached admin info of every user, e.g. after an institution, school or department is renamed.
+    """
+    try:
+        cache.incr(ADMIN_INFO_VERSION_KEY)
+    except ValueError:
+        cache.set(ADMIN_INFO_VERSION_KEY, 1, timeout=None)
+
+
+def admins_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate cached admin info when the admins of an institution, school or department change.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # The change was made from the user side, e.g. user.admin_schools.add(school)
+        invalidate_admin_info([instance.pk])
+    elif pk_set:
+        invalidate_admin_info(pk_set)
+    else:
+        # post_clear does not report which users were removed
+        invalidate_all_admin_info()
+
+
+def admin_entity_changed(sender, instance, created=False, **kwargs):
+    """
+    Invalidate cached admin info when an institution, school or department is renamed, moved or deleted.
+    """
+    if not created:
+        invalidate_all_admin_info()
+
+
+def connect_signals():
+    """
+    Connect the signal handlers that keep the cached admin info up to date.
+    """
+    for model in (Institution, School, Department):
+        m2m_changed.connect(admins_changed, sender=model.admins.through)
+        post_save.connect(admin_entity_changed, sender=model)
+        post_delete.connect(admin_entity_changed, sender=model)
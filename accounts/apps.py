@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        from accounts import admin_info
+        from accounts.token_reaper import create_token_created_index
+        from base.shared_across_apps.caches import check_shared_caches
+
+        # Cached tokens, admin info and institution trees must be invalidated in every worker process
+        check_shared_caches()
+
+        # Keep the cached admin info of user profiles up to date
+        admin_info.connect_signals()
+
+        # Index Token.created for the expired token sweep once all tables exist
+        post_migrate.connect(create_token_created_index, sender=self)
@@ -0,0 +1,40 @@
+# accounts/authentication.py
+
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from accounts.token_cache import get_token_entry
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication backed by the token cache.
+
+    Behaves like rest_framework's TokenAuthentication, but resolves tokens through accounts.token_cache
+    so that a token already resolved by TokenExpirationMiddleware does not hit the database again.
+    """
+
+    def authenticate_credentials(self, key):
+        """
+        Authenticate the token key.
+
+        Args:
+            key (str): The token key sent by the client.
+
+        Raises:
+            AuthenticationFailed: If the token does not exist or its user is inactive.
+
+        Returns:
+            tuple: The authenticated user and the token.
+        """
+        entry = get_token_entry(key)
+        if entry is None:
+            raise AuthenticationFailed('Invalid token.')
+
+        user = entry['user']
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+
+        token = Token(key=key, user=user, created=entry['created'])
+        return (user, token)
@@ -0,0 +1,194 @@
+# accounts/email_outbox.py
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction, close_old_connections
+from django.utils import timezone
+
+from accounts.models import QueuedEmail
+
+
+logger = logging.getLogger(__name__)
+
+# A single background worker per process drains the outbox after emails are queued
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='email-outbox')
+
+
+def queue_email(subject, body, from_email, to):
+    """
+    Add an email to the outbox instead of sending it during the request.
+
+    When settings.EMAIL_OUTBOX_SEND_IN_PROCESS is enabled, the outbox is drained by a background thread
+    once the current transaction commits, and periodically to retry failed emails (see start_outbox_drainer).
+    Otherwise it is drained by `python manage.py send_queued_emails --loop`, or the command run from cron.
+
+    Args:
+        subject (str): The subject of the email.
+        body (str): The body of the email.
+        from_email (str): The sender address.
+        to (list): The recipient addresses.
+
+    Returns:
+        QueuedEmail: The queued email.
+    """
+    queued_email = QueuedEmail.objects.create(subject=subject, body=body, from_email=from_email, to=list(to))
+
+    if getattr(settings, 'EMAIL_OUTBOX_SEND_IN_PROCESS', False):
+        transaction.on_commit(lambda: _executor.submit(_drain_in_background))
+
+    return queued_email
+
+
+def _drain_in_background():
+    close_old_connections()
+    try:
+        send_queued_emails()
+    except Exception:
+        logger.exception('Sending queued emails failed.')
+    finally:
+        close_old_connections()
+
+
+def send_queued_emails(batch_size=None, max_attempts=None):
+    """
+    Send all due emails in the outbox.
+
+    Emails are claimed in batches by a short transaction with SELECT ... FOR UPDATE SKIP LOCKED, which leases
+    them by moving their send_after settings.EMAIL_OUTBOX_LEASE seconds ahead, so several workers can drain
+    the outbox at once. The batch is then sent outside any transaction over a single reused mail connection,
+    and the outcome of each email is recorded afterwards. Emails of a worker that dies while sending become
+    due again once their lease expires. A failed email is retried with an exponential backoff until it has
+    been attempted `max_attempts` times, after which it is marked failed.
+
+    Args:
+        batch_size (int, optional): The number of emails sent per batch (default settings.EMAIL_OUTBOX_BATCH_SIZE).
+        max_attempts (int, optional): The number of attempts before giving up (default settings.EMAIL_OUTBOX_MAX_ATTEMPTS).
+
+    Returns:
+        dict: The number of emails sent and failed.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = max_attempts or getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    lease = timezone.timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 300))
+    totals = {'sent': 0, 'failed': 0}
+
+    while True:
+        batch = _claim_batch(batch_size, lease)
+        if not batch:
+            return totals
+
+        sent, failed = _send_batch(batch, max_attempts)
+        totals['sent'] += sent
+        totals['failed'] += failed
+
+
+def _claim_batch(batch_size, lease):
+    """
+    Lease a batch of due emails to this worker.
+
+    Returns:
+        list: The claimed emails.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=QueuedEmail.PENDING, send_after__lte=now)
+            .order_by('send_after')[:batch_size]
+        )
+        if batch:
+            QueuedEmail.objects.filter(pk__in=[queued_email.pk for queued_email in batch]).update(send_after=now + lease)
+    return batch
+
+
+def _send_batch(batch, max_attempts):
+    """
+    Send a batch of queued emails over one connection and record the outcome of each.
+
+    Returns:
+        tuple: The number of emails sent and failed.
+    """
+    now = timezone.now()
+    sent = failed = 0
+    connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as e:
+        # The mail server is unreachable: count an attempt against every email in the batch
+        for queued_email in batch:
+            _record_failure(queued_email, e, now, max_attempts)
+        QueuedEmail.objects.bulk_update(batch, ['status', 'attempts', 'last_error', 'send_after'])
+        return 0, len(batch)
+
+    try:
+        for queued_email in batch:
+            message = EmailMessage(queued_email.subject, queued_email.body, queued_email.from_email, queued_email.to, connection=connection)
+            try:
+                message.send()
+            except Exception as e:
+                _record_failure(queued_email, e, now, max_attempts)
+                failed += 1
+            else:
+                queued_email.status = QueuedEmail.SENT
+                queued_email.attempts += 1
+                queued_email.sent_at = now
+                sent += 1
+    finally:
+        connection.close()
+
+    QueuedEmail.objects.bulk_update(batch, ['status', 'attempts', 'last_error', 'send_after', 'sent_at'])
+    return sent, failed
+
+
+def _record_failure(queued_email, error, now, max_attempts):
+    queued_email.attempts += 1
+    queued_email.last_error = str(error)
+    if queued_email.attempts >= max_attempts:
+        queued_email.status = QueuedEmail.FAILED
+    else:
+        queued_email.send_after = now + timezone.timedelta(minutes=2 ** queued_email.attempts)
+
+
+def start_outbox_drainer(interval):
+    """
+    Start a daemon thread that drains the outbox every `interval` seconds, so failed emails are retried
+    even when no new email is queued.
+
+    Args:
+        interval (int): The number of seconds between drains.
+
+    Returns:
+        Thread: The started thread.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            _drain_in_background()
+
+    thread = threading.Thread(target=run, name='email-outbox-drainer', daemon=True)
+    thread.start()
+    return thread
+
+
+_drainer_lock = threading.Lock()
+_drainer_thread = None
+
+
+def start_configured_outbox_drainer():
+    """
+    Start the periodic outbox drain once per process when settings.EMAIL_OUTBOX_SEND_IN_PROCESS is enabled.
+    """
+    global _drainer_thread
+
+    interval = getattr(settings, 'EMAIL_OUTBOX_DRAIN_INTERVAL', 60)
+    if not getattr(settings, 'EMAIL_OUTBOX_SEND_IN_PROCESS', False) or not interval:
+        return
+    with _drainer_lock:
+        if _drainer_thread is None:
+            _drainer_thread = start_outbox_drainer(interval)
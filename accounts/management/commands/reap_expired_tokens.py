@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+
+from rest_framework.authtoken.models import Token
+
+from accounts.token_reaper import reap_expired_tokens, get_token_table_size
+
+
+class Command(BaseCommand):
+    help = 'Delete expired authentication tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Maximum number of tokens deleted per batch.')
+
+    def handle(self, *args, **options):
+        """
+        Delete expired tokens and report the deletion rate along with the token table size before and after.
+        """
+        size_before = get_token_table_size()
+        count_before = Token.objects.count()
+
+        result = reap_expired_tokens(batch_size=options['batch_size'])
+
+        size_after = get_token_table_size()
+        count_after = Token.objects.count()
+        rate = result['deleted'] / result['elapsed'] if result['elapsed'] else 0
+
+        self.stdout.write(f"Deleted {result['deleted']} expired tokens in {result['batches']} batches "
+                          f"({result['elapsed']:.2f}s, {rate:.0f} rows/sec).")
+        self.stdout.write(f'Tokens: {count_before} before, {count_after} after.')
+        if size_before is not None:
+            self.stdout.write(f'Token table size: {filesizeformat(size_before)} before, {filesizeformat(size_after)} after.')
+
+        self.stdout.write(self.style.SUCCESS('Expired tokens have been successfully deleted.'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.email_outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send the emails waiting in the outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Number of emails sent per batch over one connection.')
+        parser.add_argument('--max-attempts', type=int, default=None, help='Number of attempts before an email is marked failed.')
+        parser.add_argument('--loop', action='store_true', help='Keep running and drain the outbox every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between drains when running with --loop.')
+
+    def handle(self, *args, **options):
+        """
+        Drain the outbox once, or repeatedly when --loop is given.
+        """
+        while True:
+            result = send_queued_emails(batch_size=options['batch_size'], max_attempts=options['max_attempts'])
+            if result['sent'] or result['failed'] or not options['loop']:
+                self.stdout.write(f"Sent {result['sent']} emails, {result['failed']} failed.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
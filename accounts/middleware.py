@@ -4,16 +4,27 @@ from rest_framework.authtoken.models import Token
 from django.utils import timezone
 from django.http import JsonResponse
 
+from accounts import token_cache
+from accounts.email_outbox import start_configured_outbox_drainer
+from accounts.token_reaper import start_configured_token_reaper
+
 
 class TokenExpirationMiddleware:
     def __init__(self, get_response):
         """
         Initialize the TokenExpirationMiddleware.
 
+        Also starts the periodic flush of queued token refreshes, the in-process expired token reaper when
+        settings.TOKEN_REAPER_INTERVAL is set, and the periodic email outbox drain when
+        settings.EMAIL_OUTBOX_SEND_IN_PROCESS is enabled.
+
         Args:
             get_response (function): The callable that represents the next middleware or view.
         """
         self.get_response = get_response
+        token_cache.start_configured_refresh_flusher()
+        start_configured_token_reaper()
+        start_configured_outbox_drainer()
 
     def __call__(self, request):
         """
@@ -23,6 +34,9 @@ class TokenExpirationMiddleware:
         If the token has expired, it will be deleted and an error response will be returned.
         If the token is still valid, its expiration time will be updated to extend its validity.
 
+        Tokens are resolved through accounts.token_cache, so a token seen recently is checked without a database lookup,
+        and expiration updates are coalesced and written to the database in batches.
+
         Args:
             request (HttpRequest): The incoming request.
 
@@ -32,24 +46,23 @@ class TokenExpirationMiddleware:
         if 'Authorization' in request.headers:
             auth_header = request.headers['Authorization']
             token_key = auth_header.split(' ')[1]  # Extract the token from the Authorization header
-            try:
-                token = Token.objects.get(key=token_key)
-
-                if token.created < timezone.now() - timezone.timedelta(days=7):
-                    token.delete()  # Token has expired, delete it
-                    response_data = {'message': 'Token has expired. Please log in again.'}
-                    return JsonResponse(response_data, status=401)
-                else:
-                    # Update token's created time to extend its expiration
-                    token.created = timezone.now()
-                    token.save()
-
-            except Token.DoesNotExist:
-                print('Token.DoesNotExist')
+            entry = token_cache.get_token_entry(token_key)
+
+            if entry is None:
                 response_data = {
                     'message': 'Invalid token'
                 }
                 return JsonResponse(response_data, status=401)
 
+            now = timezone.now()
+            if entry['expires'] < now:
+                Token.objects.filter(key=token_key).delete()  # Token has expired, delete it
+                token_cache.invalidate_token(token_key)
+                response_data = {'message': 'Token has expired. Please log in again.'}
+                return JsonResponse(response_data, status=401)
+            else:
+                # Update token's created time to extend its expiration (written to the database in batches)
+                token_cache.refresh_token(token_key, entry, now)
+
         response = self.get_response(request)
         return response
@@ -3,6 +3,13 @@ from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseU
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from accounts import token_cache
 
 
 class CustomUserManager(BaseUserManager):
@@ -88,6 +95,10 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name']
 
+    class Meta:
+        # Serves the case-insensitive username lookups of GenericRelatedField
+        indexes = [models.Index(Lower('username'), name='customuser_username_lower_idx')]
+
     def __str__(self):
         """
         Returns the string representation of the user.
@@ -126,3 +137,57 @@ class UserProfile(models.Model):
             str: The username of the associated user.
         """
         return self.user.username
+
+
+
+class QueuedEmail(models.Model):
+    """
+    A model representing an email waiting in the outbox to be delivered by the email worker.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True, null=True)
+    to = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    send_after = models.DateTimeField(default=timezone.now)  # Delivery is retried with a backoff after failures
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'send_after']),
+        ]
+
+    def __str__(self):
+        """
+        Returns the string representation of the queued email.
+
+        Returns:
+            str: The subject and recipients of the email.
+        """
+        return f"{self.subject} -> {', '.join(self.to)}"
+
+# Signals to keep the token cache consistent with the database
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, *args, **kwargs):
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_updated_user_tokens(sender, instance, created, *args, **kwargs):
+    if not created:
+        token_cache.invalidate_user_tokens(instance)
@@ -6,7 +6,7 @@ from django.core.exceptions import ValidationError
 from accounts.models import CustomUser as User
 from accounts.models import UserProfile
 
-from institutions.models import Institution, School, Department
+from accounts.admin_info import AdminInfoBatch, get_admin_info
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -68,6 +68,28 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
+class AdminInfoListSerializer(serializers.ListSerializer):
+    """
+    List serializer that loads the admin info of every user profile nested in its rows at once.
+
+    Use it as the `list_serializer_class` of serializers that nest UserProfileSerializer. The outermost list
+    shares an AdminInfoBatch through the serializer context; nested lists and serializers built with the same
+    context (e.g. in to_representation) add their lookups to it.
+    """
+
+    def to_representation(self, data):
+        if 'admin_info_batch' in self.context:
+            return super().to_representation(data)
+
+        batch = self.context['admin_info_batch'] = AdminInfoBatch()
+        try:
+            representation = super().to_representation(data)
+            batch.load()
+        finally:
+            del self.context['admin_info_batch']
+        return representation
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = UserProfile
@@ -76,29 +98,19 @@ class UserProfileSerializer(serializers.ModelSerializer):
     admin_info = serializers.SerializerMethodField()
 
     def get_admin_info(self, obj):
-        user = obj.user
-        admin_info = {}
-
-        admin_types = {
-            'institutions': (Institution, 'institution_level'),
-            'schools': (School, 'school_level'),
-            'departments': (Department, 'department_level'),
-        }
-
-        for admin_type, (model, key) in admin_types.items():
-            entities = model.objects.filter(admins=user)
-            if entities.exists():
-                admin_info[key] = []
-
-                for entity in entities:
-                    entity_info = {'name': entity.name}
+        """
+        Get the institutions, schools and departments the user is an admin of.
 
-                    if key == 'schools':
-                        entity_info['institution'] = entity.institution.name
-                    elif key == 'departments':
-                        entity_info['school'] = entity.school.name
-                        entity_info['institution'] = entity.school.institution.name
+        The admin info is built with one query per admin level and cached per user (see accounts/admin_info.py).
+        Inside an AdminInfoListSerializer, it is loaded for all the rows at once when the list is done.
 
-                    admin_info[key].append(entity_info)
+        Args:
+            obj (UserProfile): The user profile.
 
-        return admin_info
\ No newline at end of file
+        Returns:
+            dict: The admin info of the user, keyed by admin level.
+        """
+        batch = self.context.get('admin_info_batch')
+        if batch is not None:
+            return batch.get(obj.user_id)
+        return get_admin_info(obj.user_id)
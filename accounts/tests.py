@@ -1,13 +1,29 @@
+import builtins
+import json
+import threading
+from io import StringIO
+from unittest.mock import patch
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
-from accounts.models import UserProfile
+from accounts import token_cache
+from accounts.models import UserProfile, QueuedEmail
+from accounts.email_outbox import send_queued_emails
+from accounts.token_reaper import reap_expired_tokens
+from institutions.models import Institution, School, Department
 from accounts.views import GlobalFunctions
+from base.shared_across_apps.caches import check_shared_caches
 from accounts.serializers import UserSerializer, UserProfileSerializer
 
 User = get_user_model()
@@ -35,6 +51,33 @@ class UserRegistrationViewTestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['message'], 'A verification email has been sent to test@example.com for the user testuser.')
 
+    @override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_verification_email_is_queued(self):
+        """
+        Test that registration queues the verification email instead of sending it during the request.
+        """
+        url = reverse('user-registration')
+        data = {
+            'username': 'testuser',
+            'first_name': 'Test',
+            'last_name': 'User',
+            'email': 'test@example.com',
+            'password': 'testpassbrock',
+            'confirm_password': 'testpassbrock'
+        }
+
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(QueuedEmail.objects.filter(to=['test@example.com'], status=QueuedEmail.PENDING).count(), 1)
+
+        result = send_queued_emails()
+        self.assertEqual(result, {'sent': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['test@example.com'])
+        self.assertIn('verify-email', mail.outbox[0].body)
+        self.assertEqual(QueuedEmail.objects.get().status, QueuedEmail.SENT)
+
 # Tests for UserAuthenticationView
 class UserAuthenticationTestCase(APITestCase):
     """
@@ -199,6 +242,240 @@ class UserDeleteViewTestCase(APITestCase):
         # Verify that the token is deleted or invalidated
         self.assertFalse(Token.objects.filter(key=self.token.key).exists())
 
+# Tests for TokenExpirationMiddleware and the token cache
+class TokenCacheTestCase(APITestCase):
+    """
+    Test case for token resolution through accounts.token_cache.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass', first_name='Test', last_name='User', is_active=True)
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    def test_token_entry_is_cached(self):
+        """
+        Test that a resolved token is served from the cache on subsequent lookups.
+        """
+        with self.assertNumQueries(1):
+            entry = token_cache.get_token_entry(self.token.key)
+        self.assertEqual(entry['user_id'], self.user.pk)
+
+        with self.assertNumQueries(0):
+            entry = token_cache.get_token_entry(self.token.key)
+        self.assertEqual(entry['user'], self.user)
+
+    def test_deleted_token_is_invalidated(self):
+        """
+        Test that deleting a token removes it from the cache.
+        """
+        token_cache.get_token_entry(self.token.key)
+        self.token.delete()
+        self.assertIsNone(token_cache.get_token_entry(self.token.key))
+
+    def test_authenticated_request(self):
+        """
+        Test that a valid token authenticates the request.
+        """
+        response = self.client.get(reverse('user-profile'), headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_expired_token(self):
+        """
+        Test that an expired token is rejected and deleted.
+        """
+        Token.objects.filter(key=self.token.key).update(created=timezone.now() - timezone.timedelta(days=8))
+
+        response = self.client.get(reverse('user-profile'), headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+    @override_settings(TOKEN_REFRESH_THRESHOLD=3600, TOKEN_REFRESH_INTERVAL=3600)
+    def test_refresh_is_written_in_batches(self):
+        """
+        Test that expiry refreshes are kept in memory until flushed, and only for stale tokens.
+        """
+        stale_created = timezone.now() - timezone.timedelta(hours=2)
+        Token.objects.filter(key=self.token.key).update(created=stale_created)
+        headers = {'Authorization': f'Token {self.token.key}'}
+
+        self.client.get(reverse('user-profile'), headers=headers)
+        self.client.get(reverse('user-profile'), headers=headers)
+        self.assertEqual(Token.objects.get(key=self.token.key).created, stale_created)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(token_cache.flush_token_refreshes(), 1)
+        self.assertGreater(Token.objects.get(key=self.token.key).created, stale_created)
+
+        # The stored time is now recent, so further requests do not queue another write
+        self.client.get(reverse('user-profile'), headers=headers)
+        self.assertEqual(token_cache.flush_token_refreshes(), 0)
+
+    def test_idle_process_flushes_refreshes(self):
+        """
+        Test that queued refreshes are written by the flusher thread when no further request arrives.
+        """
+        now = timezone.now()
+        entry = token_cache.get_token_entry(self.token.key)
+        entry['stored_created'] = now - timezone.timedelta(hours=2)
+        with override_settings(TOKEN_REFRESH_INTERVAL=3600):
+            token_cache.refresh_token(self.token.key, entry, now)
+        self.assertIn(self.token.key, token_cache._pending_refreshes)
+
+        # The thread's database connection cannot see the test transaction, so record the write instead
+        flushed = threading.Event()
+        written = []
+
+        def bulk_update(tokens, fields, batch_size=None):
+            written.extend((token.key, token.created) for token in tokens)
+            flushed.set()
+
+        stop = threading.Event()
+        with patch.object(Token.objects, 'bulk_update', side_effect=bulk_update):
+            thread = token_cache.start_refresh_flusher(0.01, stop=stop)
+            self.assertTrue(flushed.wait(5))
+            stop.set()
+            thread.join()
+
+        self.assertEqual(written, [(self.token.key, now)])
+
+class EmailOutboxTestCase(TestCase):
+    """
+    Test case for the email outbox.
+    """
+    def test_emails_are_leased_while_sending(self):
+        """
+        Test that emails are sent with their rows already leased, and that failures are retried later.
+        """
+        sent_email = QueuedEmail.objects.create(subject='Sent', body='Body', from_email='from@example.com', to=['sent@example.com'])
+        failing_email = QueuedEmail.objects.create(subject='Failing', body='Body', from_email='from@example.com', to=['failing@example.com'])
+        leased_until = []
+
+        def send(message, fail_silently=False):
+            leased_until.append(QueuedEmail.objects.get(subject=message.subject).send_after)
+            if message.subject == 'Failing':
+                raise ConnectionError('Mailbox unavailable')
+            return 1
+
+        with patch('accounts.email_outbox.EmailMessage.send', send):
+            result = send_queued_emails()
+
+        self.assertEqual(result, {'sent': 1, 'failed': 1})
+        self.assertTrue(all(send_after > timezone.now() for send_after in leased_until))
+        self.assertEqual(QueuedEmail.objects.get(pk=sent_email.pk).status, QueuedEmail.SENT)
+        failing_email.refresh_from_db()
+        self.assertEqual((failing_email.status, failing_email.attempts), (QueuedEmail.PENDING, 1))
+        self.assertEqual(failing_email.last_error, 'Mailbox unavailable')
+
+
+class SharedCachesTestCase(TestCase):
+    """
+    Test case for the startup check of the caches shared between worker processes.
+    """
+    def test_per_process_cache_is_refused_with_several_workers(self):
+        """
+        Test that LocMemCache is accepted for one worker process and refused for several.
+        """
+        with override_settings(WEB_CONCURRENCY=1):
+            check_shared_caches()
+        with override_settings(WEB_CONCURRENCY=4):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_caches()
+
+
+class ReapExpiredTokensCommandTestCase(TestCase):
+    """
+    Test case for the reap_expired_tokens management command.
+    """
+    def test_reap_expired_tokens(self):
+        """
+        Test that only expired tokens are deleted.
+        """
+        expired_users = [
+            User.objects.create_user(username=f'expired{i}', email=f'expired{i}@example.com', password='testpass', first_name='Test', last_name='User')
+            for i in range(3)
+        ]
+        active_user = User.objects.create_user(username='active', email='active@example.com', password='testpass', first_name='Test', last_name='User')
+        expired_keys = [Token.objects.create(user=user).key for user in expired_users]
+        active_token = Token.objects.create(user=active_user)
+        Token.objects.filter(key__in=expired_keys).update(created=timezone.now() - timezone.timedelta(days=8))
+
+        out = StringIO()
+        call_command('reap_expired_tokens', batch_size=2, stdout=out)
+
+        self.assertIn('Deleted 3 expired tokens in 2 batches', out.getvalue())
+        self.assertFalse(Token.objects.filter(key__in=expired_keys).exists())
+        self.assertTrue(Token.objects.filter(key=active_token.key).exists())
+
+    def test_reap_keeps_tokens_within_refresh_tolerance(self):
+        """
+        Test that a token whose stored time lags its last use by less than the refresh tolerance is kept.
+        """
+        user = User.objects.create_user(username='lagging', email='lagging@example.com', password='testpass', first_name='Test', last_name='User')
+        token = Token.objects.create(user=user)
+        lagging_created = timezone.now() - token_cache.TOKEN_LIFETIME - token_cache.get_stored_time_tolerance() / 2
+        Token.objects.filter(key=token.key).update(created=lagging_created)
+
+        call_command('reap_expired_tokens', stdout=StringIO())
+
+        self.assertTrue(Token.objects.filter(key=token.key).exists())
+
+    def test_reap_keeps_tokens_refreshed_during_the_sweep(self):
+        """
+        Test that a token refreshed between selecting a batch and deleting it is kept.
+        """
+        users = [
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass', first_name='Test', last_name='User')
+            for i in range(2)
+        ]
+        expired_token, refreshed_token = [Token.objects.create(user=user) for user in users]
+        Token.objects.update(created=timezone.now() - timezone.timedelta(days=9))
+
+        def select_then_refresh(keys):
+            # Another worker flushes a refresh of one of the selected tokens
+            keys = builtins.list(keys)
+            Token.objects.filter(key=refreshed_token.key).update(created=timezone.now())
+            return keys
+
+        with patch('accounts.token_reaper.list', side_effect=select_then_refresh, create=True):
+            result = reap_expired_tokens()
+
+        self.assertEqual(result['deleted'], 1)
+        self.assertFalse(Token.objects.filter(key=expired_token.key).exists())
+        self.assertTrue(Token.objects.filter(key=refreshed_token.key).exists())
+
+class AllUsersViewTestCase(APITestCase):
+    """
+    Test case for AllUsersView.
+    """
+    def setUp(self):
+        for i in range(5):
+            User.objects.create_user(username=f'user{i}', email=f'user{i}@example.com', password='testpass', first_name='Test', last_name='User')
+
+    def test_list_users_is_paginated(self):
+        """
+        Test that users are returned in cursor-paginated pages ordered by id.
+        """
+        response = self.client.get(reverse('all-users'), {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([user['username'] for user in response.data['results']], ['user0', 'user1'])
+        self.assertNotIn('password', response.data['results'][0])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([user['username'] for user in response.data['results']], ['user2', 'user3'])
+
+    def test_stream_users(self):
+        """
+        Test that users can be streamed as newline-delimited JSON and as a JSON array.
+        """
+        response = self.client.get(reverse('all-users'), {'stream': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['username'] for line in lines], [f'user{i}' for i in range(5)])
+
+        response = self.client.get(reverse('all-users'), {'stream': 'json'})
+        users = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(users), 5)
+
 # Optional: Add more test cases to cover edge cases and additional functionality
 
 
@@ -261,6 +538,35 @@ class UserProfileSerializerTestCase(TestCase):
         self.assertEqual(serializer.data['location'], 'Test location')
         # Add more assertions as needed
 
+    def test_admin_info(self):
+        """
+        Test that admin info is built with a constant number of queries, cached, and invalidated when admins change.
+        """
+        self.addCleanup(cache.clear)
+        institution = Institution.objects.create(category='university', name='Test University')
+        school = School.objects.create(name='Test School', institution=institution)
+        departments = [Department.objects.create(name=f'Department {i}', school=school) for i in range(5)]
+        institution.admins.add(self.user)
+        school.admins.add(self.user)
+        for department in departments:
+            department.admins.add(self.user)
+        profile = UserProfile.objects.create(user=self.user)
+
+        with self.assertNumQueries(3):
+            admin_info = UserProfileSerializer(profile).data['admin_info']
+        self.assertEqual(admin_info['institution_level'], [{'name': 'Test University'}])
+        self.assertEqual(admin_info['school_level'], [{'name': 'Test School', 'institution': 'Test University'}])
+        self.assertEqual(len(admin_info['department_level']), 5)
+        self.assertEqual(admin_info['department_level'][0]['school'], 'Test School')
+        self.assertEqual(admin_info['department_level'][0]['institution'], 'Test University')
+
+        with self.assertNumQueries(0):
+            UserProfileSerializer(profile).data
+
+        institution.admins.remove(self.user)
+        admin_info = UserProfileSerializer(profile).data['admin_info']
+        self.assertNotIn('institution_level', admin_info)
+
 
 
 
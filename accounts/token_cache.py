@@ -0,0 +1,250 @@
+# accounts/token_cache.py
+
+import atexit
+import logging
+import threading
+import time
+
+from rest_framework.authtoken.models import Token
+from django.core.cache import caches
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tokens expire after this period of inactivity (see TokenExpirationMiddleware).
+# The time stored in the database can lag the last use (see get_stored_time_tolerance), so expiry computed
+# from the stored time is extended by that tolerance.
+TOKEN_LIFETIME = timezone.timedelta(days=7)
+
+# Last-seen timestamps waiting to be written to the database, keyed by token key.
+_pending_refreshes = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def get_cache():
+    """
+    Return the cache used to hold resolved tokens.
+
+    The alias is configurable through settings.TOKEN_CACHE_ALIAS so that deployments running several
+    worker processes can point it at a shared backend (e.g. Redis or Memcached).
+    """
+    return caches[getattr(settings, 'TOKEN_CACHE_ALIAS', 'default')]
+
+
+def get_stored_time_tolerance():
+    """
+    Get how far the creation time stored in the database may lag the last use of a token.
+
+    Refreshes are only queued once the stored time is older than settings.TOKEN_REFRESH_THRESHOLD, and queued
+    refreshes are written every settings.TOKEN_REFRESH_INTERVAL seconds (see refresh_token). Expiry
+    decided from the stored time (a token entry built from the database, or the expired token sweep) adds this
+    tolerance, so an active token is never expired early: a token expires between TOKEN_LIFETIME and
+    TOKEN_LIFETIME plus this tolerance after its last use.
+
+    Refreshes still queued when a worker is killed (rather than exiting normally) are lost; such a token keeps
+    the older stored time and may expire up to the time since its last flushed use early.
+
+    Returns:
+        timedelta: The tolerance.
+    """
+    return timezone.timedelta(seconds=getattr(settings, 'TOKEN_REFRESH_THRESHOLD', 3600) + getattr(settings, 'TOKEN_REFRESH_INTERVAL', 60))
+
+
+def make_cache_key(token_key):
+    """
+    Build the cache key under which a token entry is stored.
+
+    Args:
+        token_key (str): The token key sent by the client.
+
+    Returns:
+        str: The cache key.
+    """
+    return f'auth-token:{token_key}'
+
+
+def build_token_entry(token):
+    """
+    Build the cache entry for a token.
+
+    Args:
+        token (Token): The token, with its user already loaded.
+
+    Returns:
+        dict: The user id, user, creation time and expiry time of the token,
+              along with the creation time currently stored in the database.
+    """
+    return {
+        'user_id': token.user_id,
+        'user': token.user,
+        'created': token.created,
+        'expires': token.created + TOKEN_LIFETIME + get_stored_time_tolerance(),
+        'stored_created': token.created,
+    }
+
+
+def get_token_entry(token_key):
+    """
+    Resolve a token key to its cache entry.
+
+    The token and its user are fetched from the database in a single query on a cache miss.
+    Subsequent lookups for the same key are served from the cache without touching the database.
+
+    Args:
+        token_key (str): The token key sent by the client.
+
+    Returns:
+        dict or None: The token entry, or None if the token does not exist.
+    """
+    cache = get_cache()
+    cache_key = make_cache_key(token_key)
+    entry = cache.get(cache_key)
+
+    if entry is None:
+        token = Token.objects.select_related('user').filter(key=token_key).first()
+        if token is None:
+            return None
+        entry = build_token_entry(token)
+        cache.set(cache_key, entry)
+
+    return entry
+
+
+def set_token_entry(token_key, entry):
+    """
+    Store an updated token entry in the cache.
+
+    Args:
+        token_key (str): The token key.
+        entry (dict): The token entry.
+    """
+    get_cache().set(make_cache_key(token_key), entry)
+
+
+def invalidate_token(token_key):
+    """
+    Remove a token from the cache.
+
+    Args:
+        token_key (str): The token key.
+    """
+    get_cache().delete(make_cache_key(token_key))
+
+
+def invalidate_user_tokens(user):
+    """
+    Remove all tokens belonging to a user from the cache, e.g. after the user has been updated.
+
+    Args:
+        user (User): The user whose tokens are invalidated.
+    """
+    token_keys = Token.objects.filter(user_id=user.pk).values_list('key', flat=True)
+    get_cache().delete_many([make_cache_key(token_key) for token_key in token_keys])
+
+
+def refresh_token(token_key, entry, now):
+    """
+    Extend the validity of a token that has just been used.
+
+    The cached entry is updated immediately so that expiry checks see the new time. The database is
+    written lazily: the token is queued only when its stored creation time is older than
+    settings.TOKEN_REFRESH_THRESHOLD seconds, and queued tokens are written together by
+    flush_token_refreshes() every settings.TOKEN_REFRESH_INTERVAL seconds, by a later request or by the
+    refresh flusher thread when the process is idle (see start_refresh_flusher).
+
+    Args:
+        token_key (str): The token key.
+        entry (dict): The token entry returned by get_token_entry.
+        now (datetime): The time at which the token was used.
+    """
+    threshold = timezone.timedelta(seconds=getattr(settings, 'TOKEN_REFRESH_THRESHOLD', 3600))
+    interval = getattr(settings, 'TOKEN_REFRESH_INTERVAL', 60)
+
+    entry['created'] = now
+    entry['expires'] = now + TOKEN_LIFETIME
+    if now - entry['stored_created'] >= threshold:
+        with _pending_lock:
+            _pending_refreshes[token_key] = now
+        entry['stored_created'] = now
+    set_token_entry(token_key, entry)
+
+    if time.monotonic() - _last_flush >= interval:
+        flush_token_refreshes()
+
+
+def flush_token_refreshes():
+    """
+    Write all queued token refreshes to the database with a single bulk UPDATE.
+
+    Returns:
+        int: The number of tokens written.
+    """
+    global _last_flush
+
+    with _pending_lock:
+        pending = dict(_pending_refreshes)
+        _pending_refreshes.clear()
+        _last_flush = time.monotonic()
+
+    if not pending:
+        return 0
+
+    tokens = [Token(key=token_key, created=created) for token_key, created in pending.items()]
+    Token.objects.bulk_update(tokens, ['created'], batch_size=1000)
+    return len(tokens)
+
+
+def start_refresh_flusher(interval, stop=None):
+    """
+    Start a daemon thread that writes the queued token refreshes every `interval` seconds, so they are stored
+    within the interval even when no further request reaches the process.
+
+    Args:
+        interval (int): The number of seconds between flushes.
+        stop (Event, optional): An event that stops the thread once set.
+
+    Returns:
+        Thread: The started thread.
+    """
+    stop = stop or threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            close_old_connections()
+            try:
+                flush_token_refreshes()
+            except Exception:
+                logger.exception('Flushing token refreshes failed.')
+            finally:
+                close_old_connections()
+
+    thread = threading.Thread(target=run, name='token-refresh-flusher', daemon=True)
+    thread.start()
+    return thread
+
+
+_flusher_lock = threading.Lock()
+_flusher_thread = None
+
+
+def start_configured_refresh_flusher():
+    """
+    Start the refresh flusher once per process, every settings.TOKEN_REFRESH_INTERVAL seconds.
+    """
+    global _flusher_thread
+
+    interval = getattr(settings, 'TOKEN_REFRESH_INTERVAL', 60)
+    if not interval:
+        return
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = start_refresh_flusher(interval)
+
+
+# Write any remaining refreshes when the worker process exits
+atexit.register(flush_token_refreshes)
@@ -0,0 +1,129 @@
+# accounts/token_reaper.py
+
+import logging
+import threading
+import time
+
+from rest_framework.authtoken.models import Token
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, close_old_connections
+from django.utils import timezone
+
+from accounts import token_cache
+
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CREATED_INDEX_NAME = 'authtoken_token_created_idx'
+
+
+def create_token_created_index(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Create the index on Token.created used by the expired token sweep.
+
+    The Token model belongs to rest_framework.authtoken, so the index cannot be declared on the model.
+    It is created after migrations instead (see AccountsConfig.ready).
+    """
+    db_connection = connections[using]
+    table = db_connection.ops.quote_name(Token._meta.db_table)
+    column = db_connection.ops.quote_name('created')
+    with db_connection.cursor() as cursor:
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {TOKEN_CREATED_INDEX_NAME} ON {table} ({column})')
+
+
+def get_token_table_size():
+    """
+    Get the on-disk size of the token table, including its indexes.
+
+    Returns:
+        int or None: The size in bytes, or None if the database does not report table sizes.
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_total_relation_size(%s)', [Token._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+def reap_expired_tokens(batch_size=1000):
+    """
+    Delete expired tokens in batches.
+
+    Each batch selects at most batch_size of the oldest expired keys through the index on Token.created
+    and deletes them, so no single statement holds locks on an unbounded number of rows.
+
+    Args:
+        batch_size (int): The maximum number of tokens deleted per batch.
+
+    Returns:
+        dict: The number of deleted tokens, the number of batches, and the elapsed time in seconds.
+    """
+    # Write pending expiry refreshes first so recently used tokens are not considered expired
+    token_cache.flush_token_refreshes()
+
+    # The stored creation time can lag the last use, so only tokens stale beyond that tolerance are expired
+    cutoff = timezone.now() - token_cache.TOKEN_LIFETIME - token_cache.get_stored_time_tolerance()
+    expired_tokens = Token.objects.filter(created__lt=cutoff).order_by('created')
+
+    deleted = 0
+    batches = 0
+    started = time.monotonic()
+    while True:
+        keys = list(expired_tokens.values_list('key', flat=True)[:batch_size])
+        if not keys:
+            break
+        # Repeat the cutoff: a token refreshed since the SELECT is live again and must be kept
+        _, deleted_per_model = Token.objects.filter(key__in=keys, created__lt=cutoff).delete()
+        deleted += deleted_per_model.get(Token._meta.label, 0)
+        batches += 1
+
+    return {
+        'deleted': deleted,
+        'batches': batches,
+        'elapsed': time.monotonic() - started,
+    }
+
+
+def start_token_reaper(interval, batch_size=1000):
+    """
+    Start a daemon thread that reaps expired tokens every `interval` seconds.
+
+    Args:
+        interval (int): The number of seconds between sweeps.
+        batch_size (int): The maximum number of tokens deleted per batch.
+
+    Returns:
+        Thread: The started thread.
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                reap_expired_tokens(batch_size=batch_size)
+            except Exception:
+                logger.exception('Expired token sweep failed.')
+            finally:
+                close_old_connections()
+
+    thread = threading.Thread(target=run, name='token-reaper', daemon=True)
+    thread.start()
+    return thread
+
+
+_reaper_lock = threading.Lock()
+_reaper_thread = None
+
+
+def start_configured_token_reaper():
+    """
+    Start the in-process token reaper once per process if settings.TOKEN_REAPER_INTERVAL is set.
+    """
+    global _reaper_thread
+
+    interval = getattr(settings, 'TOKEN_REAPER_INTERVAL', 0)
+    if not interval:
+        return
+    with _reaper_lock:
+        if _reaper_thread is None:
+            _reaper_thread = start_token_reaper(interval)
@@ -1,18 +1,23 @@
 # accounts/views.py
 
+import json
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, authentication, permissions
+from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
 from rest_framework import generics
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
 
 
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.urls import reverse
-from django.core.mail import EmailMessage
 from django.contrib.auth import authenticate
+from django.db import transaction
+from django.http import StreamingHttpResponse
 
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
@@ -21,6 +26,8 @@ User = get_user_model()
 
 
 from accounts.serializers import UserSerializer, UserProfileSerializer
+from accounts.authentication import CachedTokenAuthentication
+from accounts.email_outbox import queue_email
 # from accounts.models import CustomUser as User
 from accounts.models import UserProfile
 
@@ -46,7 +53,10 @@ class GlobalFunctions:
     @staticmethod
     def send_verification_email(request, email, verification_token, username):
         """
-        Sends a verification email to the user.
+        Queues a verification email to the user.
+
+        The email is written to the outbox and delivered by the email worker (see accounts/email_outbox.py),
+        so the request does not wait for the mail server.
 
         Args:
             request (HttpRequest): The current request.
@@ -61,8 +71,7 @@ class GlobalFunctions:
         message = f'Hello {username},\n\nClick the following link to verify your email: {absolute_url}'
         from_email = settings.EMAIL_HOST_USER
         to_email = [email]
-        email = EmailMessage(subject, message, from_email, to_email)
-        email.send()
+        queue_email(subject, message, from_email, to_email)
 
     @staticmethod
     def generate_token(user):
@@ -93,12 +102,13 @@ class UserRegistrationView(APIView):
         serializer = UserSerializer(data=request.data)
         
         if serializer.is_valid():
-            user = serializer.save()
-            # Create a user profile
-            UserProfile.objects.create(user=user)
+            with transaction.atomic():
+                user = serializer.save()
+                # Create a user profile
+                UserProfile.objects.create(user=user)
 
-            verification_token = GlobalFunctions.generate_email_verification_token(user)
-            GlobalFunctions.send_verification_email(request, user.email, verification_token, user.username)
+                verification_token = GlobalFunctions.generate_email_verification_token(user)
+                GlobalFunctions.send_verification_email(request, user.email, verification_token, user.username)
 
             response_data = {
                 'message': f'A verification email has been sent to {user.email} for the user {user.username}.'
@@ -211,7 +221,7 @@ class UserLogoutView(APIView):
 
     
 class UserProfileView(APIView):
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -249,7 +259,7 @@ class UserProfileView(APIView):
 
 
 class UserDeleteView(APIView):
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def delete(self, request):
@@ -268,6 +278,65 @@ class UserDeleteView(APIView):
         user.delete()
         return Response({'message': 'Account deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
 
+class AllUsersPagination(CursorPagination):
+    """
+    Cursor pagination over users keyed on the primary key, so every page is an index range scan.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = 'id'
+
+
 class AllUsersView(generics.ListAPIView):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
\ No newline at end of file
+    """
+    Lists all users.
+
+    Users are returned in pages (see AllUsersPagination). Passing `?stream=json` or `?stream=ndjson` instead
+    streams every user as a JSON array or as newline-delimited JSON, reading the table in chunks so memory
+    use does not grow with the number of users.
+    """
+    queryset = User.objects.only('id', 'username', 'first_name', 'last_name', 'email')
+    serializer_class = UserSerializer
+    pagination_class = AllUsersPagination
+    stream_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        """
+        Returns a page of users, or all users as a stream when the `stream` query parameter is provided.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            Response or StreamingHttpResponse: The page of users or the streamed users.
+        """
+        stream_format = request.query_params.get('stream')
+        if not stream_format:
+            return super().list(request, *args, **kwargs)
+
+        if stream_format == 'ndjson':
+            return StreamingHttpResponse(self.stream_ndjson(), content_type='application/x-ndjson')
+        if stream_format == 'json':
+            return StreamingHttpResponse(self.stream_json(), content_type='application/json')
+
+        return Response({'message': "The 'stream' parameter must be either 'json' or 'ndjson'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    def iter_users(self):
+        """
+        Serialize users one at a time, fetching them from the database in chunks.
+        """
+        serializer = self.get_serializer()
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        for user in queryset.iterator(chunk_size=self.stream_chunk_size):
+            yield json.dumps(serializer.to_representation(user), cls=JSONEncoder)
+
+    def stream_ndjson(self):
+        for user in self.iter_users():
+            yield user + '\n'
+
+    def stream_json(self):
+        yield '['
+        for index, user in enumerate(self.iter_users()):
+            yield user if index == 0 else ',' + user
+        yield ']'
\ No newline at end of file
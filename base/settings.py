@@ -28,6 +28,59 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS')
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND')
 
+# Email outbox: emails are queued and sent in batches over one connection (see accounts/email_outbox.py).
+# With EMAIL_OUTBOX_SEND_IN_PROCESS the outbox is drained by a background thread after each queued email and
+# every EMAIL_OUTBOX_DRAIN_INTERVAL seconds (to retry failures); otherwise run
+# `python manage.py send_queued_emails --loop` as a separate worker, or the command from cron.
+EMAIL_OUTBOX_SEND_IN_PROCESS = os.getenv('EMAIL_OUTBOX_SEND_IN_PROCESS', 'True') == 'True'
+EMAIL_OUTBOX_DRAIN_INTERVAL = int(os.getenv('EMAIL_OUTBOX_DRAIN_INTERVAL', 60))
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+# Seconds a claimed batch is leased to one worker; must exceed the time needed to send a batch
+EMAIL_OUTBOX_LEASE = int(os.getenv('EMAIL_OUTBOX_LEASE', 300))
+
+# Caches: the default cache holds the admin info of user profiles (accounts/admin_info.py) and the institution
+# trees (institutions/hierarchy.py); the 'tokens' cache holds resolved auth tokens (accounts/token_cache.py).
+# Their invalidations must reach every worker process, so both use Redis when REDIS_URL is set.
+# LocMemCache is per process: set WEB_CONCURRENCY to the number of worker processes, and startup is refused
+# when it is above 1 and either cache is per process (see base/shared_across_apps/caches.py).
+REDIS_URL = os.getenv('REDIS_URL')
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+SHARED_CACHE_ALIASES = ['default', 'tokens']
+
+
+def _cache_config(prefix, location, **locmem_options):
+    backend = os.getenv(f'{prefix}_BACKEND')
+    if backend is None:
+        backend = 'django.core.cache.backends.redis.RedisCache' if REDIS_URL else 'django.core.cache.backends.locmem.LocMemCache'
+    config = {'BACKEND': backend, 'LOCATION': os.getenv(f'{prefix}_LOCATION', REDIS_URL or location)}
+    if backend.endswith('LocMemCache'):
+        config['OPTIONS'] = locmem_options
+    return config
+
+
+CACHES = {
+    'default': _cache_config('CACHE', 'uninet-default'),
+    'tokens': {
+        **_cache_config('TOKEN_CACHE', 'uninet-tokens', MAX_ENTRIES=int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', 10000))),
+        'TIMEOUT': int(os.getenv('TOKEN_CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': 'tokens',
+    },
+}
+TOKEN_CACHE_ALIAS = 'tokens'
+
+# Token expiry refreshes are kept in memory and written in bulk (see accounts/token_cache.py).
+# A token is only rewritten once its stored time is older than TOKEN_REFRESH_THRESHOLD seconds,
+# and pending writes are flushed every TOKEN_REFRESH_INTERVAL seconds by a background thread in each worker.
+# Expiry decided from the stored time allows for that lag: tokens expire 7 days after their last use,
+# plus at most TOKEN_REFRESH_THRESHOLD + TOKEN_REFRESH_INTERVAL seconds.
+TOKEN_REFRESH_THRESHOLD = int(os.getenv('TOKEN_REFRESH_THRESHOLD', 3600))
+TOKEN_REFRESH_INTERVAL = int(os.getenv('TOKEN_REFRESH_INTERVAL', 60))
+
+# Expired tokens are deleted by `python manage.py reap_expired_tokens`.
+# Set TOKEN_REAPER_INTERVAL (seconds) to also run the sweep inside each worker process; 0 disables it.
+TOKEN_REAPER_INTERVAL = int(os.getenv('TOKEN_REAPER_INTERVAL', 0))
+
 # Custom user model: Added by signmeup
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
@@ -174,6 +227,28 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Document downloads (see notes/downloads.py): set NOTES_DOWNLOAD_OFFLOAD to 'x-sendfile' (Apache) or
+# 'x-accel-redirect' (nginx) to let the web server stream files instead of the Django workers.
+# With 'x-accel-redirect', NOTES_X_ACCEL_REDIRECT_PREFIX is the internal location that maps to MEDIA_ROOT.
+NOTES_DOWNLOAD_OFFLOAD = os.getenv('NOTES_DOWNLOAD_OFFLOAD') or None
+NOTES_X_ACCEL_REDIRECT_PREFIX = os.getenv('NOTES_X_ACCEL_REDIRECT_PREFIX', '/protected/')
+
+# Largest file size (in bytes) a chunked upload may declare (see notes.serializers.DocumentUploadSerializer)
+NOTES_MAX_UPLOAD_SIZE = int(os.getenv('NOTES_MAX_UPLOAD_SIZE', 1024 ** 3))
+
+# Stored document files are shared between documents with identical content, so they are deleted by
+# `python manage.py delete_orphaned_document_files` (run it from cron) once unreferenced and idle for this many hours.
+NOTES_ORPHANED_FILE_GRACE_HOURS = int(os.getenv('NOTES_ORPHANED_FILE_GRACE_HOURS', 24))
+
+# Postgres text search configuration used by the document search (see notes/search.py)
+NOTES_SEARCH_CONFIG = os.getenv('NOTES_SEARCH_CONFIG', 'english')
+
+# Per-page text extraction of uploaded PDFs (see notes/text_extraction.py, requires pypdf): either run in the
+# background after each upload, or by `python manage.py extract_document_text --loop`.
+NOTES_TEXT_EXTRACTION_IN_PROCESS = os.getenv('NOTES_TEXT_EXTRACTION_IN_PROCESS', 'False') == 'True'
+NOTES_TEXT_EXTRACTION_WORKERS = int(os.getenv('NOTES_TEXT_EXTRACTION_WORKERS', '0')) or None  # Defaults to the CPU count
+NOTES_TEXT_EXTRACTION_BATCH_SIZE = int(os.getenv('NOTES_TEXT_EXTRACTION_BATCH_SIZE', '100'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+
+def check_shared_caches():
+    """
+    Refuse to start several worker processes with per-process caches that must be invalidated everywhere.
+
+    The caches in SHARED_CACHE_ALIASES are invalidated with version keys and deletions (cached tokens, admin info,
+    institution trees). With a per-process backend such as LocMemCache, an invalidation only reaches the process
+    that made it, and the other processes keep serving stale entries until they expire.
+
+    Raises:
+        ImproperlyConfigured: If WEB_CONCURRENCY is above 1 and one of the caches is per process.
+    """
+    if getattr(settings, 'WEB_CONCURRENCY', 1) <= 1:
+        return
+    for alias in getattr(settings, 'SHARED_CACHE_ALIASES', []):
+        if isinstance(caches[alias], LocMemCache):
+            raise ImproperlyConfigured(
+                f"The '{alias}' cache uses LocMemCache, which is not shared between the {settings.WEB_CONCURRENCY} "
+                "worker processes. Set REDIS_URL (or a shared cache backend) or run a single worker process."
+            )
@@ -1,12 +1,17 @@
+import operator
+from functools import reduce
 from typing import List
 
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 
-from django.db import models
-from django.db.models import Q
+from django.db import models, router, transaction
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Exists, OuterRef, Q, Value
+from django.db.models.functions import Lower
 from django.db.models import Model
+from django.db.models.signals import m2m_changed
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 
@@ -28,6 +33,20 @@ class AdminsModelMixin(models.Model):
     
     admins = models.ManyToManyField(User, related_name="admin_%(class)ss", blank=True)
 
+    def get_user_ids_from_fields(self, *user_fields) -> set:
+        """
+        Get the ids of the users in the specified user fields, without fetching the users.
+
+        Args:
+            *user_fields: Names of foreign keys to User, e.g. 'head' or 'created_by'.
+
+        Returns:
+            set: The ids of the users set in the fields.
+        """
+        user_ids = {getattr(self, self._meta.get_field(field).attname) for field in user_fields}
+        user_ids.discard(None)
+        return user_ids
+
     def add_admins_from_specified_fields(self, *user_fields):
         """
         Add users from specified fields to the 'admins' field.
@@ -42,13 +61,53 @@ class AdminsModelMixin(models.Model):
                 default_admins (List[str]): List of default admin fields to add to the instance.
                 default_admins = ['head', 'secretary', 'created_by']
 
-        This method iterates through the specified fields, retrieves the User instance from each field,
-        and adds it to the 'admins' field if it is not already present.
+        The users that are not admins yet are added with a single insert (see update_admins).
+        """
+        self.update_admins(add=self.get_user_ids_from_fields(*user_fields))
+
+    def update_admins(self, add=(), remove=()):
         """
-        for field in user_fields:
-            user = getattr(self, field, None)
-            if user and user not in self.admins.all():
-                self.admins.add(user)
+        Apply a change to the 'admins' field as one diff against the current admins.
+
+        The current admin ids are fetched once, and the change is applied with at most one bulk insert and one
+        bulk delete on the through table, in one transaction. A user both added and removed stays an admin.
+        m2m_changed is sent as for admins.add() and admins.remove(), so cached admin info stays up to date.
+
+        Args:
+            add (iterable): Users, or user ids, to make admins.
+            remove (iterable): Users, or user ids, to remove from the admins.
+
+        Returns:
+            tuple: The ids of the users added and removed (sets).
+        """
+        add_ids = {getattr(user, 'pk', user) for user in add if user is not None}
+        remove_ids = {getattr(user, 'pk', user) for user in remove if user is not None} - add_ids
+
+        with transaction.atomic():
+            current_ids = set(self.admins.values_list('pk', flat=True))
+            added, removed = add_ids - current_ids, remove_ids & current_ids
+            self._change_admins('remove', removed)
+            self._change_admins('add', added)
+        return added, removed
+
+    def _change_admins(self, action, user_ids):
+        if not user_ids:
+            return
+        manager = self.admins
+        through = manager.through
+        source, target = f'{manager.source_field_name}_id', f'{manager.target_field_name}_id'
+        db = router.db_for_write(through, instance=self)
+        signal_kwargs = {'sender': through, 'instance': self, 'reverse': False, 'model': manager.model, 'pk_set': user_ids, 'using': db}
+
+        m2m_changed.send(action=f'pre_{action}', **signal_kwargs)
+        if action == 'add':
+            # Ignoring conflicts keeps a concurrent update adding the same admin from failing
+            through.objects.using(db).bulk_create(
+                [through(**{source: self.pk, target: user_id}) for user_id in user_ids], ignore_conflicts=True
+            )
+        else:
+            through.objects.using(db).filter(**{source: self.pk, f'{target}__in': user_ids}).delete()
+        m2m_changed.send(action=f'post_{action}', **signal_kwargs)
 
     class Meta:
         abstract = True
@@ -73,30 +132,19 @@ class AdminsSerializerMixin:
             Model: The instance with combined admin fields.
         """
         provided_admins = validated_data.pop('admins', [])
-        instance.add_admins_from_specified_fields(*default_admins)
-        instance.admins.add(*provided_admins)
+        instance.update_admins(add=instance.get_user_ids_from_fields(*default_admins) | {user.pk for user in provided_admins})
         return instance
 
-    @staticmethod
-    def merge_admins(existing_admins: List, new_admins: List) -> List:
-        """
-        Merge existing and new admin users while ensuring no duplicates.
-
-        Args:
-            existing_admins (List): List of existing admin users.
-            new_admins (List): List of new admin users.
-
-        Returns:
-            List: Merged list of admin users.
-        """
-        return list(set(existing_admins) | set(new_admins))
-
     @staticmethod
     def update_admins_for_instance(instance: Model, validated_data: dict, default_admin_fields: List[str]) -> Model:
         """
         Update admin users for the given instance based on the provided validated data.
         Used in the update method of the serializer.
 
+        Provided admins, removed admins and changed default admins (e.g. a new head) are combined into a
+        single diff applied by AdminsModelMixin.update_admins. The users of the default admin fields before
+        the update cannot be removed through 'remove_admins'.
+
         Args:
             instance (Model): The instance for which admins are updated.
             validated_data (dict): The validated data dictionary from the serializer.
@@ -105,21 +153,20 @@ class AdminsSerializerMixin:
         Returns:
             Model: The updated instance.
         """
-        old_default_admins = {getattr(instance, field) for field in default_admin_fields}
-        remove_admins = set(validated_data.pop('remove_admins', [])) - old_default_admins
-        
-        instance.admins.remove(*remove_admins)
-        
-        new_admins = validated_data.pop('admins', [])
-        merged_admins = AdminsSerializerMixin.merge_admins(instance.admins.all(), new_admins)
-        instance.admins.set(merged_admins)
-        
-        # check if any default admins have changed users and update the admins list for the instance accordingly
+        old_default_admins = instance.get_user_ids_from_fields(*default_admin_fields)
+        add = {user.pk for user in validated_data.pop('admins', [])}
+        remove = {user.pk for user in validated_data.pop('remove_admins', [])} - old_default_admins
+
+        # A default admin field that changes users moves the admin status from the old user to the new one
         for field in default_admin_fields:
-            new_user = validated_data.get(field, getattr(instance, field))
-            if new_user != getattr(instance, field):
-                instance.admins.remove(getattr(instance, field))
-                instance.admins.add(new_user)
+            new_user = validated_data.get(field)
+            old_user_id = getattr(instance, instance._meta.get_field(field).attname)
+            if new_user is not None and new_user.pk != old_user_id:
+                add.add(new_user.pk)
+                if old_user_id is not None:
+                    remove.add(old_user_id)
+
+        instance.update_admins(add=add, remove=remove)
         return instance
 
 
@@ -150,22 +197,26 @@ class ObjectLookupMixin:
         if id_param_value:
             objs = queryset.filter(pk=id_param_value)
             #obj = get_object_or_404(queryset, pk=id_param_value)
-            if objs.count() == 0:
+            if not objs:  # Evaluates the queryset once; callers reuse the fetched rows
                 raise ValidationError(f"No object found with id '{id_param_value}'")
         
         elif name_param_value:
-            filter_conditions = Q(name__iexact=name_param_value)
-            if not filters:
-                objs = queryset.filter(filter_conditions)
-            else:
-                for key, value in filters.items():
-                    if value:
-                        if isinstance(value, models.Model):
-                            filter_conditions &= Q(**{f"{key}__exact": value})
-                        else:
-                            filter_conditions &= Q(**{f"{key}__iexact": value})
-                objs = queryset.filter(filter_conditions)
-            if objs.count() == 0:
+            # Case-insensitive matches are written as lower(column) = lower(value) so they are served by the
+            # lower(name) functional indexes; __iexact compiles to UPPER() on Postgres, which no index covers
+            lowered_names = {'lookup_name': Lower('name')}
+            filter_conditions = Q(lookup_name=Lower(Value(name_param_value)))
+            for position, (key, value) in enumerate((filters or {}).items()):
+                if value:
+                    if isinstance(value, models.Model):
+                        filter_conditions &= Q(**{f"{key}__exact": value})
+                    elif key != 'name' and not key.endswith('__name'):
+                        filter_conditions &= Q(**{f"{key}__iexact": value})
+                    else:
+                        alias = f'lookup_filter_{position}'
+                        lowered_names[alias] = Lower(key)
+                        filter_conditions &= Q(**{alias: Lower(Value(value))})
+            objs = queryset.alias(**lowered_names).filter(filter_conditions)
+            if not objs:  # Evaluates the queryset once; callers reuse the fetched rows
                 raise ValidationError(f"No {name_param} found with name '{name_param_value}'")
 
         else:
@@ -175,10 +226,70 @@ class ObjectLookupMixin:
     def check_authorization(self, obj, user, authorized_users_field='admins'):
         """
         Check if the user is authorized to perform actions on the object.
-        The user must be an object-level admin to perform these actions.
+        The user must be an admin of the object or of one of its ancestors, e.g. the department, school or
+        institution of a course (see get_authority_condition).
+
+        The decision is a single EXISTS query, and is cached for the rest of the request.
         """
-        if user not in getattr(obj, authorized_users_field).all():
-            return False  # Return False when the user is not authorized
+        if not user.is_authenticated:
+            return False
+
+        cache = self.get_authorization_cache()
+        key = (user.pk, obj._meta.label, obj.pk, authorized_users_field)
+        if key not in cache:
+            condition = get_authority_condition(type(obj), user, authorized_users_field)
+            cache[key] = condition is not None and type(obj)._default_manager.filter(condition, pk=obj.pk).exists()
+        return cache[key]
+
+    def get_authorization_cache(self):
+        """
+        Get the authorization decisions cached on the current request, from a view or a serializer.
+        """
+        request = getattr(self, 'request', None) or getattr(self, 'context', {}).get('request')
+        if request is None:
+            return {}
+        cache = getattr(request, 'authorization_cache', None)
+        if cache is None:
+            cache = request.authorization_cache = {}
+        return cache
+
+
+def get_authority_condition(model, user, authorized_users_field='admins'):
+    """
+    Build the condition matching the objects of `model` that the user has authority over.
+
+    Authority is inherited down the `authority_parent` chain declared on the models
+    (Institution -> School -> Department -> Course -> Unit): the admins of an object are authorized on it and
+    on everything below it. Each level is an EXISTS probe on the unique (object, user) index of its admins
+    through table.
+
+    Args:
+        model: The model of the objects.
+        user: The user.
+        authorized_users_field (str): The many-to-many field holding the authorized users at each level.
+
+    Returns:
+        Q or None: The condition, or None if no level of the chain has the field.
+    """
+    conditions = []
+    lookup = ''
+    while model is not None:
+        try:
+            users_field = model._meta.get_field(authorized_users_field)
+        except FieldDoesNotExist:
+            users_field = None
+        if users_field is not None and users_field.many_to_many:
+            conditions.append(Exists(users_field.remote_field.through.objects.filter(**{
+                users_field.m2m_field_name(): OuterRef(lookup or 'pk'),
+                users_field.m2m_reverse_field_name(): user.pk,
+            })))
 
-        return True  # Return True when the user is authorized
+        parent = getattr(model, 'authority_parent', None)
+        if parent is None:
+            break
+        lookup = f'{lookup}__{parent}' if lookup else parent
+        model = model._meta.get_field(parent).related_model
 
+    if not conditions:
+        return None
+    return reduce(operator.or_, conditions)
@@ -1,10 +1,53 @@
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, Q
+from django.db.models.functions import Lower
+
+def get_related_object_cache(context):
+    """
+    Get the identity map that GenericRelatedField resolves objects through.
+
+    The map lives on the request, so every field and serializer handling the same request shares it and an
+    object referenced by several fields is fetched once. Without a request it lives in the serializer context.
+
+    Args:
+        context (dict): The serializer context.
+
+    Returns:
+        dict: The cached objects, keyed by the queryset they were resolved from and their lookup value.
+    """
+    request = context.get('request')
+    if request is None:
+        return context.setdefault('related_object_cache', {})
+    cache = getattr(request, 'related_object_cache', None)
+    if cache is None:
+        cache = request.related_object_cache = {}
+    return cache
+
+
+class GenericManyRelatedField(serializers.ManyRelatedField):
+    """
+    The many=True form of GenericRelatedField, resolving the whole list with a single query.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.resolve(data)
+
 
 class GenericRelatedField(serializers.RelatedField):
     """
     A serializer field designed for handling related models, allowing the use of either the primary key or a specified field's string representation in the request.
     
     This field can accommodate various related models and offers the flexibility to query based on either the primary key or the string representation of a specified field.
+    Field values are matched case-insensitively. With many=True the whole list is resolved with one
+    `lower(field) IN (...)` query and every missing value is reported at once. Resolved objects are kept in a
+    request-scoped identity map (see get_related_object_cache), so fields sharing a queryset fetch each object once.
 
     Args:
         field (str): The name of the field to use for the query.
@@ -23,6 +66,14 @@ class GenericRelatedField(serializers.RelatedField):
         self.field = field
         super().__init__(**kwargs)
 
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return GenericManyRelatedField(**list_kwargs)
+
     def to_internal_value(self, data):
         """
         Convert the external representation (e.g., primary key or field value) to an internal value (the object itself).
@@ -33,16 +84,67 @@ class GenericRelatedField(serializers.RelatedField):
         Returns:
             object: The internal representation of the related object.
         """
-        # Check if the data is an integer (expected primary key)
-        if isinstance(data, int):
-            return self.queryset.get(pk=data)
+        return self.resolve([data])[0]
 
-        # Treat it as the field and retrieve the object
-        filter_kwargs = {f'{self.field}__iexact': data}
-        try:
-            return self.queryset.get(**filter_kwargs)
-        except self.queryset.model.DoesNotExist:
-            raise serializers.ValidationError(f"{self.queryset.model.__name__} {data} does not exist")
+    def resolve(self, values):
+        """
+        Resolve a list of primary keys and field values to objects with at most one query.
+
+        Args:
+            values (list): Primary keys (integers) and field values, in any mix.
+
+        Returns:
+            list: The objects, in the order of `values`.
+
+        Raises:
+            ValidationError: Listing every value that matches no object, or more than one.
+        """
+        queryset = self.get_queryset()
+        model_name = queryset.model.__name__
+        keys = [('pk', value) if isinstance(value, int) else ('field', str(value).lower()) for value in values]
+
+        if queryset.query.is_empty():
+            found, ambiguous = {}, set()
+        else:
+            cache = get_related_object_cache(self.context).setdefault((self.field, str(queryset.query)), {})
+            self.fetch_missing(queryset, cache, [key for key in keys if key not in cache])
+            found = {key: obj for key, obj in cache.items() if obj is not None}
+            ambiguous = {key for key, obj in cache.items() if obj is None}
+
+        errors = []
+        for value, key in zip(values, keys):
+            if key in ambiguous:
+                errors.append(f"{model_name} {value} matches more than one {model_name}")
+            elif key not in found:
+                errors.append(f"{model_name} {value} does not exist")
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [found[key] for key in keys]
+
+    def fetch_missing(self, queryset, cache, keys):
+        """
+        Fetch the objects for `keys` that are not cached yet and add them to the cache.
+
+        Field values matching several objects are cached as None so they are reported as ambiguous.
+        """
+        pks = {value for kind, value in keys if kind == 'pk'}
+        field_values = {value for kind, value in keys if kind == 'field'}
+        if not pks and not field_values:
+            return
+
+        conditions = Q()
+        if pks:
+            conditions |= Q(pk__in=pks)
+        if field_values:
+            conditions |= Q(generic_lookup_value__in=field_values)
+        for obj in queryset.alias(generic_lookup_value=Lower(self.field)).filter(conditions):
+            if obj.pk in pks:
+                cache[('pk', obj.pk)] = obj
+            value = str(getattr(obj, self.field)).lower()
+            if value in field_values:
+                key = ('field', value)
+                cached = cache.get(key, obj)
+                cache[key] = obj if cached is not None and cached.pk == obj.pk else None
 
     def to_representation(self, obj):
         """
@@ -54,4 +156,106 @@ class GenericRelatedField(serializers.RelatedField):
         Returns:
             str: The external representation of the related object.
         """
-        return getattr(obj, self.field)
\ No newline at end of file
+        return getattr(obj, self.field)
+
+def _resolve_relation_path(model, path):
+    """
+    Split a serializer source path into the relations it follows.
+
+    Args:
+        model: The model the path starts from.
+        path (list): The attribute names of the source, e.g. ['department', 'school', 'name'].
+
+    Returns:
+        list: (relation name, model field, related model) for every leading attribute that is a relation.
+    """
+    relations = []
+    for name in path:
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            break
+        if not model_field.is_relation or model_field.related_model is None:
+            break
+        relations.append((name, model_field, model_field.related_model))
+        model = model_field.related_model
+    return relations
+
+
+def get_prefetch_plan(serializer, model=None, prefix=''):
+    """
+    Build the select_related and prefetch_related lookups needed to serialize a queryset with `serializer`.
+
+    The plan is derived from the serializer tree: dotted sources and single related fields become
+    select_related joins, many-valued related fields become prefetches, and nested many=True serializers
+    become Prefetch objects whose querysets carry the nested serializer's own plan. Serializers that add
+    related data in to_representation declare it in `prefetch_serializers` ({relation: serializer class}).
+    Serializing with the plan applied costs one query per many-valued relation in the tree, however many rows there are.
+
+    Args:
+        serializer: A serializer instance (its fields must be buildable, so it should carry the request context).
+        model: The model being serialized (default serializer.Meta.model).
+        prefix (str): The lookup prefix of a single nested serializer.
+
+    Returns:
+        tuple: The select_related lookups (set) and the prefetch_related lookups (list).
+    """
+    model = model or serializer.Meta.model
+    select_related, prefetch_related = set(), []
+
+    def add_many(lookup, related_model, nested_serializer=None):
+        if any(prefetch.prefetch_through == lookup for prefetch in prefetch_related):
+            return
+        queryset = related_model._default_manager.all()
+        if nested_serializer is not None:
+            queryset = apply_prefetch_plan(queryset, nested_serializer)
+        prefetch_related.append(Prefetch(lookup, queryset=queryset))
+
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*' or isinstance(field, serializers.PrimaryKeyRelatedField):
+            continue  # A primary key is read from the row itself
+        relations = _resolve_relation_path(model, field.source.split('.'))
+        if not relations:
+            continue
+
+        # Follow the single-valued relations with joins, up to the first many-valued one
+        lookup = prefix
+        for position, (name, model_field, related_model) in enumerate(relations):
+            lookup = f'{lookup}__{name}' if lookup else name
+            if model_field.many_to_many or model_field.one_to_many:
+                nested = None
+                if position == len(relations) - 1:
+                    if isinstance(field, serializers.ListSerializer):
+                        nested = field.child
+                    elif isinstance(field, serializers.BaseSerializer):
+                        nested = field
+                add_many(lookup, related_model, nested)
+                break
+            select_related.add(lookup)
+        else:
+            if isinstance(field, serializers.BaseSerializer) and not isinstance(field, serializers.ListSerializer):
+                # A single nested serializer: its relations are reached through this one
+                nested_select, nested_prefetch = get_prefetch_plan(field, relations[-1][2], lookup)
+                select_related |= nested_select
+                prefetch_related += nested_prefetch
+
+    for name, serializer_class in getattr(serializer, 'prefetch_serializers', {}).items():
+        relations = _resolve_relation_path(model, [name])
+        if relations:
+            lookup = f'{prefix}__{name}' if prefix else name
+            nested = serializer_class(context=serializer.context)
+            add_many(lookup, relations[0][2], nested)
+
+    return select_related, prefetch_related
+
+
+def apply_prefetch_plan(queryset, serializer):
+    """
+    Apply the prefetch plan of `serializer` (see get_prefetch_plan) to a queryset.
+    """
+    select_related, prefetch_related = get_prefetch_plan(serializer, queryset.model)
+    if select_related:
+        queryset = queryset.select_related(*sorted(select_related))
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
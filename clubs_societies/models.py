@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 
 from institutions.models import Institution
@@ -28,6 +29,8 @@ class ClubSociety(AdminsModelMixin, models.Model):
 
     class Meta:
         unique_together = ['name', 'institution']
+        # Case-insensitive name lookups (see ObjectLookupMixin.lookup_object)
+        indexes = [models.Index(Lower('name'), 'institution', name='clubsociety_name_lower_idx')]
     
     def __str__(self):
         return self.name
@@ -1,5 +1,5 @@
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from accounts.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -18,7 +18,7 @@ class ClubSocietyViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = ClubSociety.objects.all()
     serializer_class = ClubSocietySerializer
     
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InstitutionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'institutions'
+
+    def ready(self):
+        from institutions import hierarchy
+
+        # Invalidate the cached institution trees when any level of the hierarchy changes
+        hierarchy.connect_signals()
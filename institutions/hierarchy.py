@@ -0,0 +1,98 @@
+# institutions/hierarchy.py
+
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+
+from .models import Institution, School, Department, Course, Unit
+
+
+HIERARCHY_VERSION_KEY = 'institution-hierarchy-version'
+
+
+def _cache_key(institution_id, version):
+    return f'institution-hierarchy:{version}:{institution_id}'
+
+
+def build_hierarchy(institution_id):
+    """
+    Build the Institution -> School -> Department -> Course -> Unit tree of an institution with one query per level.
+
+    Args:
+        institution_id (int): The id of the institution.
+
+    Returns:
+        dict or None: The tree, or None if the institution does not exist.
+    """
+    institution = Institution.objects.filter(pk=institution_id).values('id', 'name', 'category').first()
+    if institution is None:
+        return None
+
+    levels = [
+        (School.objects.filter(institution=institution_id), 'institution_id', 'schools'),
+        (Department.objects.filter(school__institution=institution_id), 'school_id', 'departments'),
+        (Course.objects.filter(department__school__institution=institution_id), 'department_id', 'courses'),
+        (Unit.objects.filter(course__department__school__institution=institution_id), 'course_id', 'units'),
+    ]
+    parents = {institution['id']: institution}
+    for queryset, parent_field, children_key in levels:
+        for parent in parents.values():
+            parent[children_key] = []
+        nodes = {}
+        for node in queryset.order_by('name', 'id').values('id', 'name', parent_field):
+            parent_id = node.pop(parent_field)
+            parents[parent_id][children_key].append(node)
+            nodes[node['id']] = node
+        parents = nodes
+
+    return institution
+
+
+def get_hierarchy(institution_id):
+    """
+    Get the tree of an institution and its ETag, building and caching them on a cache miss.
+
+    Args:
+        institution_id (int): The id of the institution.
+
+    Returns:
+        tuple or None: The strong ETag and the tree, or None if the institution does not exist.
+    """
+    version = cache.get_or_set(HIERARCHY_VERSION_KEY, 0, timeout=None)
+    key = _cache_key(institution_id, version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        hierarchy = build_hierarchy(institution_id)
+        if hierarchy is None:
+            return None
+        digest = hashlib.sha256(json.dumps(hierarchy, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+        snapshot = (f'"{digest}"', hierarchy)
+        cache.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_hierarchies():
+    """
+    Invalidate the cached tree of every institution.
+    """
+    try:
+        cache.incr(HIERARCHY_VERSION_KEY)
+    except ValueError:
+        cache.set(HIERARCHY_VERSION_KEY, 1, timeout=None)
+
+
+def hierarchy_changed(sender, **kwargs):
+    invalidate_hierarchies()
+
+
+def connect_signals():
+    """
+    Connect the signal handlers that invalidate the cached trees on any write to the five models.
+
+    QuerySet.update() and bulk_create() send no signals; call invalidate_hierarchies() after using them.
+    """
+    for model in (Institution, School, Department, Course, Unit):
+        post_save.connect(hierarchy_changed, sender=model)
+        post_delete.connect(hierarchy_changed, sender=model)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 from base.shared_across_apps.mixins import AdminsModelMixin
 
@@ -15,6 +16,10 @@ class Institution(AdminsModelMixin, models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="created_institutions", null=True)
     #admins = models.ManyToManyField(User, related_name="admin_institutions", blank=True)
 
+    class Meta:
+        # Case-insensitive name lookups (see ObjectLookupMixin.lookup_object)
+        indexes = [models.Index(Lower('name'), name='institution_name_lower_idx')]
+
     def __str__(self):
         return self.name
     
@@ -24,32 +29,43 @@ class School(AdminsModelMixin, models.Model):
     head = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="school_head")
     secretary = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="school_secretary")
     institution = models.ForeignKey(Institution, on_delete=models.CASCADE, related_name="schools")
+    # Admins of the institution are authorized on this school (see ObjectLookupMixin.check_authorization)
+    authority_parent = 'institution'
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="created_schools", null=True)
 
     def __str__(self):
         return self.name
     class Meta:
         unique_together = ('name', 'institution')
+        indexes = [models.Index(Lower('name'), 'institution', name='school_name_lower_idx')]
 
 class Department(AdminsModelMixin, models.Model):
     name = models.CharField(max_length=200)
     head = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="department_head")
     secretary = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="department_secretary")
     school = models.ForeignKey(School, on_delete=models.CASCADE, related_name="departments")
+    # Admins of the school are authorized on this department (see ObjectLookupMixin.check_authorization)
+    authority_parent = 'school'
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="created_departments", null=True)
 
     def __str__(self):
         return self.name
     class Meta:
         unique_together = ('name', 'school')
+        indexes = [models.Index(Lower('name'), 'school', name='department_name_lower_idx')]
 
 
 # Model for a course offered by the department
 class Course(models.Model):
     name = models.CharField(max_length=200)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="courses")
+    # Department, school and institution admins are authorized on the course (see ObjectLookupMixin.check_authorization)
+    authority_parent = 'department'
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="created_courses", null=True)
 
+    class Meta:
+        indexes = [models.Index(Lower('name'), 'department', name='course_name_lower_idx')]
+
     def __str__(self):
         return self.name
 
@@ -57,7 +73,12 @@ class Course(models.Model):
 class Unit(models.Model):
     name = models.CharField(max_length=200)
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="units")
+    # Courses have no admins of their own, so units are authorized through the course's department and above
+    authority_parent = 'course'
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="created_units", null=True)
 
+    class Meta:
+        indexes = [models.Index(Lower('name'), 'course', name='unit_name_lower_idx')]
+
     def __str__(self):
         return self.name
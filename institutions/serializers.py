@@ -2,6 +2,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from .models import Institution, School, Department, Course, Unit
+from accounts.serializers import AdminInfoListSerializer
 from lecturers.serializers import LecturerSerializer
 from clubs_societies.serializers import ClubSocietySerializer
 from clubs_societies.models import ClubSociety
@@ -43,9 +44,9 @@ class UnitSerializer(ObjectLookupMixin, serializers.ModelSerializer):
                                              'department__school__name': provided_school,
                                              'department__name': provided_department})[0]
         
-        authorized = self.check_authorization(course.department, user)
+        authorized = self.check_authorization(course, user)
         if not authorized:
-            raise ValidationError(f"You are not an admin in Department of '{course.department.name}'. Only department admins can create units.")
+            raise ValidationError(f"You are not an admin of the Department of '{course.department.name}'. Only admins of the department, or of the school or institution above it, can create units.")
 
         validated_data['course'] = course
         instance = super().create(validated_data)
@@ -80,7 +81,7 @@ class CourseSerializer(ObjectLookupMixin, serializers.ModelSerializer):
             if authorized:
                 validated_data['department'] = department
             else:
-                raise ValidationError(f"You are not an admin in Department of '{department.name}'. Only department admins can create courses.")
+                raise ValidationError(f"You are not an admin of the Department of '{department.name}'. Only admins of the department, or of the school or institution above it, can create courses.")
         
         else:
             departments = Department.objects.filter(admins=user)
@@ -100,8 +101,12 @@ class DepartmentSerializer(ObjectLookupMixin, AdminsSerializerMixin, serializers
     class Meta:
         model = Department
         fields = '__all__'
+        list_serializer_class = AdminInfoListSerializer  # Loads the admin info of all the lecturers at once
 
     courses = CourseSerializer(many=True, read_only=True)
+    # Related data added in to_representation, for get_prefetch_plan
+    prefetch_serializers = {'lecturers': LecturerSerializer}
+
     head = GenericRelatedField(queryset=User.objects.all(), field="username", required=False)
     secretary = GenericRelatedField(queryset=User.objects.all(), field="username", required=False)
     created_by = serializers.StringRelatedField(source='created_by.username', read_only=True)
@@ -130,7 +135,7 @@ class DepartmentSerializer(ObjectLookupMixin, AdminsSerializerMixin, serializers
             if authorized:
                 validated_data['school'] = school
             else:
-                raise ValidationError(f"You are not an admin in School of '{school.name}'. Only school admins can create departments.")
+                raise ValidationError(f"You are not an admin of the School of '{school.name}'. Only admins of the school, or of the institution above it, can create departments.")
         
         else:
             schools = School.objects.filter(admins=user)
@@ -161,7 +166,7 @@ class DepartmentSerializer(ObjectLookupMixin, AdminsSerializerMixin, serializers
         representation = super().to_representation(instance)
 
         # Include the serialized representation of lecturers
-        lecturers = LecturerSerializer(instance.lecturers.all(), many=True).data
+        lecturers = LecturerSerializer(instance.lecturers.all(), many=True, context=self.context).data
         representation['lecturers'] = lecturers
 
         return representation
@@ -171,6 +176,7 @@ class SchoolSerializer(AdminsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = School
         fields = '__all__'
+        list_serializer_class = AdminInfoListSerializer  # Loads the admin info of all the lecturers at once
 
     departments = DepartmentSerializer(many=True, read_only=True)
     institution = serializers.StringRelatedField(source='institution.name', read_only=True)
@@ -1,3 +1,292 @@
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+from accounts.models import UserProfile
+from base.shared_across_apps.mixins import ObjectLookupMixin
+from base.shared_across_apps.serializers import GenericRelatedField
+from institutions.hierarchy import build_hierarchy
+from institutions.models import Institution, School, Department, Course, Unit
+from institutions.serializers import InstitutionSerializer
+from lecturers.models import Lecturer
+
+User = get_user_model()
+
+
+class ObjectLookupMixinTestCase(TestCase):
+    """
+    Test case for ObjectLookupMixin.lookup_object.
+    """
+    def lookup(self, queryset, params, filters=None):
+        request = Request(APIRequestFactory().get('/', params))
+        return ObjectLookupMixin().lookup_object(request, queryset, filters=filters)
+
+    def test_lookup_by_name(self):
+        """
+        Test that names are matched case-insensitively, including names across joins, in a single query.
+        """
+        institution = Institution.objects.create(category='University', name='University of Nairobi')
+        other_institution = Institution.objects.create(category='University', name='Moi University')
+        school = School.objects.create(name='School of Engineering', institution=institution)
+        School.objects.create(name='School of Engineering', institution=other_institution)
+        department = Department.objects.create(name='Civil Engineering', school=school)
+
+        with self.assertNumQueries(1):
+            schools = self.lookup(School.objects.all(), {'name': 'school of ENGINEERING'}, filters={'institution__name': 'university of nairobi'})
+            self.assertEqual(schools[0], school)
+
+        departments = self.lookup(Department.objects.all(), {'name': 'civil engineering'}, filters={'school__institution__name': 'UNIVERSITY OF NAIROBI', 'school': school})
+        self.assertEqual(list(departments), [department])
+
+        with self.assertRaises(ValidationError):
+            self.lookup(School.objects.all(), {'name': 'School of Law'}, filters={'institution__name': 'University of Nairobi'})
+
+
+class GenericRelatedFieldTestCase(TestCase):
+    """
+    Test case for GenericRelatedField.
+    """
+    class AdminsSerializer(serializers.Serializer):
+        admins = GenericRelatedField(queryset=User.objects.all(), field='username', many=True)
+        head = GenericRelatedField(queryset=User.objects.all(), field='username', required=False)
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{i}@example.com', username=f'User{i}', first_name='User', last_name='', password='password')
+            for i in range(20)
+        ]
+
+    def test_many_resolves_with_one_query(self):
+        """
+        Test that a list is resolved with one query, in order and case-insensitively, and that a user
+        referenced again by another field comes from the identity map.
+        """
+        usernames = [user.username.upper() for user in reversed(self.users)]
+        serializer = self.AdminsSerializer(data={'admins': usernames + [self.users[0].pk], 'head': 'user3'}, context={})
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        admins = serializer.validated_data['admins']
+        self.assertEqual(admins, list(reversed(self.users)) + [self.users[0]])
+        self.assertIs(serializer.validated_data['head'], admins[usernames.index('USER3')])
+
+    def test_missing_values_are_reported_together(self):
+        """
+        Test that every value matching no user is reported.
+        """
+        serializer = self.AdminsSerializer(data={'admins': ['user1', 'nobody', 'user2', 'ghost', 9999]}, context={})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['admins'], [
+            'CustomUser nobody does not exist',
+            'CustomUser ghost does not exist',
+            'CustomUser 9999 does not exist',
+        ])
+
+
+class AdminsMixinTestCase(TestCase):
+    """
+    Test case for the admin maintenance of AdminsModelMixin and AdminsSerializerMixin.
+    """
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'admin{i}@example.com', username=f'admin{i}', first_name='Admin', last_name='', password='password')
+            for i in range(6)
+        ]
+        self.institution = Institution.objects.create(category='University', name='University of Nairobi', chancellor=self.users[0], created_by=self.users[0])
+        self.institution.update_admins(add=self.users[:3])
+
+    def test_update_applies_one_diff(self):
+        """
+        Test that an update adds, removes and moves admins with one fetch, one delete and one insert.
+        """
+        validated_data = {
+            'admins': [self.users[3], self.users[4]],
+            'remove_admins': [self.users[0], self.users[1]],  # The chancellor cannot be removed
+            'vice_chancellor': self.users[5],
+        }
+        with CaptureQueriesContext(connection) as context:
+            InstitutionSerializer.update_admins_for_instance(self.institution, validated_data, ['chancellor', 'vice_chancellor'])
+
+        statements = [query['sql'].split()[0] for query in context if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(statements, ['SELECT', 'DELETE', 'INSERT'])
+        self.assertEqual(set(self.institution.admins.all()), {self.users[0], self.users[2], self.users[3], self.users[4], self.users[5]})
+        self.assertEqual(validated_data, {'vice_chancellor': self.users[5]})
+
+    def test_update_without_changes_only_fetches(self):
+        """
+        Test that adding existing admins does not write to the through table.
+        """
+        with CaptureQueriesContext(connection) as context:
+            added, removed = self.institution.update_admins(add=self.users[:2])
+
+        statements = [query['sql'].split()[0] for query in context if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(statements, ['SELECT'])
+        self.assertEqual((added, removed), (set(), set()))
+
+
+class CheckAuthorizationTestCase(TestCase):
+    """
+    Test case for ObjectLookupMixin.check_authorization.
+    """
+    def setUp(self):
+        self.institution_admin, self.school_admin, self.department_admin, self.other_user = [
+            User.objects.create_user(email=f'{name}@example.com', username=name, first_name='Test', last_name='', password='password')
+            for name in ('institution_admin', 'school_admin', 'department_admin', 'other_user')
+        ]
+        self.institution = Institution.objects.create(category='University', name='University of Nairobi')
+        self.school = School.objects.create(name='School of Engineering', institution=self.institution)
+        self.department = Department.objects.create(name='Civil Engineering', school=self.school)
+        self.course = Course.objects.create(name='Structural Engineering', department=self.department)
+        self.unit = Unit.objects.create(name='Statics', course=self.course)
+        self.institution.admins.add(self.institution_admin)
+        self.school.admins.add(self.school_admin)
+        self.department.admins.add(self.department_admin)
+
+    def check(self, obj, user):
+        view = ObjectLookupMixin()
+        view.request = Request(APIRequestFactory().get('/'))
+        return view.check_authorization(obj, user)
+
+    def test_authority_is_inherited_down_the_hierarchy(self):
+        """
+        Test that the admins of an object are authorized on it and on everything below it, and nobody else.
+        """
+        expected = {
+            self.institution_admin: {self.institution, self.school, self.department, self.course, self.unit},
+            self.school_admin: {self.school, self.department, self.course, self.unit},
+            self.department_admin: {self.department, self.course, self.unit},
+            self.other_user: set(),
+        }
+        for user, authorized_objects in expected.items():
+            for obj in (self.institution, self.school, self.department, self.course, self.unit):
+                with self.subTest(user=user.username, obj=obj.name):
+                    self.assertEqual(self.check(obj, user), obj in authorized_objects)
+
+    def test_decision_is_one_query_cached_per_request(self):
+        """
+        Test that a decision costs one query without loading the parents, and none when repeated in the request.
+        """
+        unit = Unit.objects.get(pk=self.unit.pk)
+        view = ObjectLookupMixin()
+        view.request = Request(APIRequestFactory().get('/'))
+
+        with self.assertNumQueries(1):
+            self.assertTrue(view.check_authorization(unit, self.school_admin))
+            self.assertTrue(view.check_authorization(unit, self.school_admin))
+
+
+class SchoolHierarchyQueriesTestCase(TestCase):
+    """
+    Test case for the prefetch plan of the nested school serialization.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass', first_name='Test', last_name='User')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.institution = Institution.objects.create(category='University', name='University of Nairobi')
+        self.school = School.objects.create(name='School of Engineering', institution=self.institution, head=self.user, created_by=self.user)
+        self.school.admins.add(self.user)
+
+    def add_department(self, number):
+        # Each department has its own lecturer, who is an admin of it
+        lecturer_user = User.objects.create_user(username=f'lecturer{number}', email=f'lecturer{number}@example.com', password='testpass', first_name='Lecturer', last_name=str(number))
+        UserProfile.objects.create(user=lecturer_user)
+        lecturer = Lecturer.objects.create(user=lecturer_user, institution=self.institution)
+        department = Department.objects.create(name=f'Department {number}', school=self.school, head=self.user, created_by=self.user)
+        department.admins.add(lecturer_user)
+        lecturer.departments.add(department)
+        for course_number in range(3):
+            Course.objects.create(name=f'Course {number}.{course_number}', department=department, created_by=self.user)
+
+    def count_queries(self):
+        # Nothing is cached, so the admin info of every lecturer is computed
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('school-retrieve-school'), {'name': self.school.name, 'institution': self.institution.name})
+        self.assertEqual(response.status_code, 200)
+        return len(context), response.data
+
+    def test_school_queries_do_not_grow_with_rows(self):
+        """
+        Test that reading a school costs the same number of queries with one or several departments, courses and lecturers.
+        """
+        self.add_department(1)
+        one_department_queries, data = self.count_queries()
+        self.assertEqual(len(data[0]['departments'][0]['courses']), 3)
+        lecturer = data[0]['departments'][0]['lecturers'][0]
+        self.assertEqual(lecturer['user'], 'lecturer1')
+        self.assertEqual(lecturer['profile']['admin_info'], {
+            'department_level': [{'name': 'Department 1', 'school': 'School of Engineering', 'institution': 'University of Nairobi'}],
+        })
+
+        for number in range(2, 6):
+            self.add_department(number)
+        several_department_queries, data = self.count_queries()
+        self.assertEqual(len(data[0]['departments']), 5)
+        self.assertEqual(
+            [department['lecturers'][0]['profile']['admin_info']['department_level'][0]['name'] for department in data[0]['departments']],
+            [department['name'] for department in data[0]['departments']],
+        )
+        self.assertEqual(one_department_queries, several_department_queries)
+
+
+class InstitutionHierarchyTestCase(TestCase):
+    """
+    Test case for the institution hierarchy snapshot.
+    """
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass', first_name='Test', last_name='User')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.institution = Institution.objects.create(category='University', name='University of Nairobi')
+        for school_number in range(2):
+            school = School.objects.create(name=f'School {school_number}', institution=self.institution)
+            for department_number in range(2):
+                department = Department.objects.create(name=f'Department {school_number}.{department_number}', school=school)
+                course = Course.objects.create(name=f'Course {school_number}.{department_number}', department=department)
+                Unit.objects.create(name=f'Unit {school_number}.{department_number}', course=course)
+
+    def get(self, **headers):
+        return self.client.get(reverse('institution-retrieve-hierarchy'), {'id': self.institution.pk}, **headers)
+
+    def test_hierarchy_is_built_with_one_query_per_level(self):
+        """
+        Test that the tree is built with five queries and nests every level.
+        """
+        with self.assertNumQueries(5):
+            hierarchy = build_hierarchy(self.institution.pk)
+
+        self.assertEqual([school['name'] for school in hierarchy['schools']], ['School 0', 'School 1'])
+        department = hierarchy['schools'][1]['departments'][0]
+        self.assertEqual(department['name'], 'Department 1.0')
+        self.assertEqual(department['courses'][0]['units'], [{'id': Unit.objects.get(name='Unit 1.0').pk, 'name': 'Unit 1.0'}])
+
+    def test_etag_revalidation_and_invalidation(self):
+        """
+        Test that a matching If-None-Match is answered with 304 from the cache, and that a write changes the ETag.
+        """
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Unit.objects.create(name='Unit 0.0.1', course=Course.objects.get(name='Course 0.0'))
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.data['schools'][0]['departments'][0]['courses'][0]['units']), 2)
 
-# Create your tests here.
@@ -1,22 +1,26 @@
 from rest_framework import viewsets
-from rest_framework.authentication import TokenAuthentication
+from accounts.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 
 from django.shortcuts import get_object_or_404
 from django.db.models import QuerySet
+from django.utils.cache import get_conditional_response, patch_cache_control
 
+from .hierarchy import get_hierarchy
 from .models import Institution, School, Department, Course, Unit
 from .serializers import InstitutionSerializer, SchoolSerializer, DepartmentSerializer, CourseSerializer, UnitSerializer
 from base.shared_across_apps.mixins import ObjectLookupMixin
+from base.shared_across_apps.serializers import apply_prefetch_plan
 
 class InstitutionViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = Institution.objects.all()
     serializer_class = InstitutionSerializer
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
@@ -28,6 +32,32 @@ class InstitutionViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         serializer = self.get_serializer(institution, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['GET'])
+    def retrieve_hierarchy(self, request):
+        """
+        Get the whole School -> Department -> Course -> Unit tree of an institution in one response.
+
+        The tree is cached until any institution, school, department, course or unit changes (see
+        institutions.hierarchy), and carries an ETag: a request whose If-None-Match matches is answered with
+        304 Not Modified.
+        """
+        institution_id = request.query_params.get('id', None)
+        if institution_id:
+            if not institution_id.isdigit():
+                raise ValidationError(f"No object found with id '{institution_id}'")
+        else:
+            institution_id = self.lookup_object(request, self.queryset)[0].pk
+
+        snapshot = get_hierarchy(int(institution_id))
+        if snapshot is None:
+            raise ValidationError(f"No object found with id '{institution_id}'")
+        etag, hierarchy = snapshot
+
+        response = get_conditional_response(request, etag=etag) or Response(hierarchy)
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
     @action(detail=False, methods=['PUT'])
     def update_institution(self, request):
         institution = self.lookup_object(request, self.queryset)[0]
@@ -58,16 +88,23 @@ class SchoolViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = School.objects.all()
     serializer_class = SchoolSerializer
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            # Load the whole nested school tree with a fixed number of queries
+            queryset = apply_prefetch_plan(queryset, self.get_serializer())
+        return queryset
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
     @action(detail=False, methods=['GET'])
     def retrieve_school(self, request):
         institution_name = request.query_params.get('institution', None)
-        schools = self.lookup_object(request, self.queryset, filters={'institution__name': institution_name})
+        schools = self.lookup_object(request, self.get_queryset(), filters={'institution__name': institution_name})
         serializer = self.get_serializer(schools, many=True)            
         return Response(serializer.data)
 
@@ -77,11 +114,11 @@ class SchoolViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         if not institution_name:
             return Response({'error': 'You must provide the institution in the query parameters of the request'}, status=status.HTTP_400_BAD_REQUEST)
 
-        school = self.lookup_object(request, self.queryset, filters={'institution__name': institution_name})[0]
+        school = self.lookup_object(request, self.get_queryset(), filters={'institution__name': institution_name})[0]
         authorized = self.check_authorization(school, request.user)
 
         if not authorized:
-            return Response({'error': 'You are not authorized to update this school. Only school-level admins can update.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to update this school. Only admins of this school or of its institution can update.'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(school, data=request.data, partial=True)
         if serializer.is_valid():
@@ -95,11 +132,11 @@ class SchoolViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         if not institution_name:
             return Response({'error': 'You must provide the institution in the query parameters of the request'}, status=status.HTTP_400_BAD_REQUEST)
 
-        school = self.lookup_object(request, self.queryset, filters={'institution__name': institution_name})[0]
+        school = self.lookup_object(request, self.get_queryset(), filters={'institution__name': institution_name})[0]
         authorized = self.check_authorization(school, request.user)
 
         if not authorized:
-            return Response({'error': 'You are not authorized to DELETE this school. Only school-level admins can DELETE.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to DELETE this school. Only admins of this school or of its institution can DELETE.'}, status=status.HTTP_403_FORBIDDEN)
 
         school.delete()
         return Response({'message': 'School deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
@@ -108,8 +145,15 @@ class DepartmentViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = Department.objects.all()
     serializer_class = DepartmentSerializer
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method == 'GET':
+            # Load the whole nested department tree with a fixed number of queries
+            queryset = apply_prefetch_plan(queryset, self.get_serializer())
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
@@ -117,7 +161,7 @@ class DepartmentViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     @action(detail=False, methods=['GET'])
     def retrieve_department(self, request):
         institution_name = request.query_params.get('institution', None)
-        departments = self.lookup_object(request, self.queryset, filters={'school__institution__name': institution_name})
+        departments = self.lookup_object(request, self.get_queryset(), filters={'school__institution__name': institution_name})
         serializer = self.get_serializer(departments, many=True)
         return Response(serializer.data)
 
@@ -128,11 +172,11 @@ class DepartmentViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         if not institution_name:
             return Response({'error': 'You must provide the institution in the query parameters of the request'}, status=status.HTTP_400_BAD_REQUEST)
 
-        department = self.lookup_object(request, self.queryset, filters={'school__institution__name': institution_name})[0]
+        department = self.lookup_object(request, self.get_queryset(), filters={'school__institution__name': institution_name})[0]
         authorized = self.check_authorization(department, request.user)
 
         if not authorized:
-            return Response({'error': 'You are not authorized to update this school. Only school-level admins can update.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to update this department. Only admins of this department or of the school or institution above it can update.'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(department, data=request.data, partial=True)
         if serializer.is_valid():
@@ -146,11 +190,11 @@ class DepartmentViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         if not institution_name:
             return Response({'error': 'You must provide the institution in the query parameters of the request'}, status=status.HTTP_400_BAD_REQUEST)
 
-        department = self.lookup_object(request, self.queryset, filters={'school__institution__name': institution_name})[0]
+        department = self.lookup_object(request, self.get_queryset(), filters={'school__institution__name': institution_name})[0]
         authorized = self.check_authorization(department, request.user)
 
         if not authorized:
-            return Response({'error': 'You are not authorized to DELETE this department. Only department-level admins can DELETE.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to DELETE this department. Only admins of this department or of the school or institution above it can DELETE.'}, status=status.HTTP_403_FORBIDDEN)
 
         department.delete()
         return Response({'message': 'Department deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
@@ -160,7 +204,7 @@ class CourseViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def perform_create(self, serializer):
@@ -181,10 +225,9 @@ class CourseViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         
         course = self.lookup_object(request, self.queryset, filters={'department__school__institution__name': institution_name})[0]
         # If you have authorization checks, perform them here
-        department = course.department
-        authorized = self.check_authorization(department, request.user)
+        authorized = self.check_authorization(course, request.user)
         if not authorized:
-            return Response({'error': 'You are not authorized to update this course. Only Department-level admins can update.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to update this course. Only admins of its department or of the school or institution above it can update.'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(course, data=request.data, partial=True)
         if serializer.is_valid():
@@ -200,10 +243,9 @@ class CourseViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
         
         course = self.lookup_object(request, self.queryset, filters={'department__school__institution__name': institution_name})[0]
         # If you have authorization checks, perform them here
-        department = course.department
-        authorized = self.check_authorization(department, request.user)
+        authorized = self.check_authorization(course, request.user)
         if not authorized:
-            return Response({'error': 'You are not authorized to DELETE this course. Only Department-level admins can delete.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to DELETE this course. Only admins of its department or of the school or institution above it can delete.'}, status=status.HTTP_403_FORBIDDEN)
 
         course.delete()
         return Response({'message': 'Course deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
@@ -213,7 +255,7 @@ class UnitViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     
     def perform_create(self, serializer):
@@ -256,10 +298,9 @@ class UnitViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
             }
         )[0]
 
-        department = unit.course.department
-        authorized = self.check_authorization(department, request.user)
+        authorized = self.check_authorization(unit, request.user)
         if not authorized:
-            return Response({'error': 'You are not authorized to update this unit. Only Department-level admins can update.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to update this unit. Only admins of its department or of the school or institution above it can update.'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(unit, data=request.data, partial=True)
         if serializer.is_valid():
@@ -284,10 +325,9 @@ class UnitViewSet(ObjectLookupMixin, viewsets.ModelViewSet):
             }
         )[0]
 
-        department = unit.course.department
-        authorized = self.check_authorization(department, request.user)
+        authorized = self.check_authorization(unit, request.user)
         if not authorized:
-            return Response({'error': 'You are not authorized to delete this unit. Only Department-level admins can delete.'}, status=status.HTTP_403_FORBIDDEN)
+            return Response({'error': 'You are not authorized to delete this unit. Only admins of its department or of the school or institution above it can delete.'}, status=status.HTTP_403_FORBIDDEN)
 
         unit.delete()
         return Response({'message': 'Unit deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from institutions.models import Institution, School, Department, Course, Unit
 from notes.models import Document
@@ -25,6 +26,8 @@ class Lecture(models.Model):
 
     class Meta:
         unique_together = ['lecturer', 'unit', 'name', 'date']
+        # Case-insensitive name lookups (see ObjectLookupMixin.lookup_object)
+        indexes = [models.Index(Lower('name'), 'unit', name='lecture_name_lower_idx')]
 
     def __str__(self):
         return f"{self.title} - {self.date}"
\ No newline at end of file
@@ -3,7 +3,7 @@ from rest_framework.exceptions import ValidationError
 
 from .models import Lecturer, Lecture
 
-from accounts.serializers import UserProfileSerializer
+from accounts.serializers import AdminInfoListSerializer, UserProfileSerializer
 
 from base.shared_across_apps.serializers import GenericRelatedField
 from base.shared_across_apps.mixins import ObjectLookupMixin
@@ -144,6 +144,7 @@ class LecturerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lecturer
         fields = '__all__'
+        list_serializer_class = AdminInfoListSerializer  # Loads the admin info of all the profiles at once
 
     user = serializers.ReadOnlyField(source='user.username')
     profile = UserProfileSerializer(source='user.profile', read_only=True)
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from notes import search, text_extraction
+
+        # Keep the document search vectors up to date
+        search.connect_signals()
+        text_extraction.connect_signals()
@@ -0,0 +1,159 @@
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, content_disposition_header
+
+
+RANGE_HEADER_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def get_document_validators(document):
+    """
+    Build the validators used for conditional requests on a document download.
+
+    Args:
+        document (Document): The document being downloaded.
+
+    Returns:
+        tuple: The strong ETag, the last modified timestamp and the size of the file in bytes.
+    """
+    size = document.document.size
+    last_modified = int(document.updated_at.timestamp())
+    etag = f'"{document.pk}-{int(document.updated_at.timestamp() * 1000000)}-{size}"'
+    return etag, last_modified, size
+
+
+def parse_range_header(range_header, size):
+    """
+    Parse a single byte range from the Range header.
+
+    Args:
+        range_header (str): The value of the Range header.
+        size (int): The size of the file in bytes.
+
+    Returns:
+        tuple or None: The first and last byte positions (inclusive), or None if the header is not a single
+        valid byte range. Raises ValueError if the range cannot be satisfied.
+    """
+    match = RANGE_HEADER_RE.match(range_header.strip())
+    if not match:
+        return None  # Unsupported (e.g. multiple ranges): the whole file is served instead
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if first and last and int(last) < int(first):
+        return None  # Invalid ranges are ignored (RFC 9110, section 14.2), so the whole file is served
+    if size == 0:
+        raise ValueError('Unsatisfiable range.')  # No byte range of an empty file can be satisfied
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Unsatisfiable range.')
+        return max(size - length, 0), size - 1
+
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        raise ValueError('Unsatisfiable range.')
+    return first, last
+
+
+def if_range_matches(request, etag, last_modified):
+    """
+    Check whether the If-Range precondition allows a partial response.
+    """
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def iter_file_range(file, first, last):
+    """
+    Read the bytes from `first` to `last` (inclusive) of an open file in chunks.
+    """
+    try:
+        file.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def serve_document(request, document):
+    """
+    Serve the file of a document as a download.
+
+    Supports conditional requests (ETag / Last-Modified, answered with 304 Not Modified) and single byte
+    ranges (answered with 206 Partial Content). When settings.NOTES_DOWNLOAD_OFFLOAD is 'x-sendfile' or
+    'x-accel-redirect', the file transfer is handed off to the web server instead of being streamed by Django.
+
+    Args:
+        request: The HTTP request.
+        document (Document): The document to serve.
+
+    Returns:
+        HttpResponse: The download response.
+    """
+    etag, last_modified, size = get_document_validators(document)
+    # Stored file names are content digests, so the download is named after the document title
+    filename = document.title + os.path.splitext(document.document.name)[1]
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    offload = getattr(settings, 'NOTES_DOWNLOAD_OFFLOAD', None)
+    if offload == 'x-sendfile':
+        response = HttpResponse(content_type='application/octet-stream')
+        response['X-Sendfile'] = document.document.path
+    elif offload == 'x-accel-redirect':
+        response = HttpResponse(content_type='application/octet-stream')
+        response['X-Accel-Redirect'] = getattr(settings, 'NOTES_X_ACCEL_REDIRECT_PREFIX', '/protected/') + document.document.name
+    else:
+        response = _build_file_response(request, document, etag, last_modified, size, filename)
+        if response.status_code == 416:
+            return response
+
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _build_file_response(request, document, etag, last_modified, size, filename):
+    range_header = request.headers.get('Range')
+    if range_header and if_range_matches(request, etag, last_modified):
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range is not None:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                iter_file_range(document.document.open('rb'), first, last),
+                status=206,
+                content_type='application/octet-stream',
+            )
+            response['Content-Range'] = f'bytes {first}-{last}/{size}'
+            response['Content-Length'] = str(last - first + 1)
+            return response
+
+    return FileResponse(document.document.open('rb'), as_attachment=True, filename=filename)
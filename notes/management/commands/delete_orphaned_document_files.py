@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from notes.orphaned_files import delete_orphaned_document_files
+
+
+class Command(BaseCommand):
+    help = 'Delete stored document files that no document references any more.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='Only delete files idle for more than this many hours (default settings.NOTES_ORPHANED_FILE_GRACE_HOURS).')
+
+    def handle(self, *args, **options):
+        """
+        Delete orphaned files and report how many were deleted.
+        """
+        grace_period = timedelta(hours=options['hours']) if options['hours'] is not None else None
+        deleted = delete_orphaned_document_files(grace_period)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} orphaned document files.'))
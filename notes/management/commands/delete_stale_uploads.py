@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notes.models import DocumentUpload
+from notes.uploads import delete_part_file
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked document uploads that have not received a chunk for a while, along with their partial files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Delete uploads idle for more than this many hours.')
+
+    def handle(self, *args, **options):
+        """
+        Delete idle uploads and report how many were deleted.
+        """
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        deleted = 0
+        for upload in DocumentUpload.objects.filter(updated_at__lt=cutoff).iterator():
+            delete_part_file(upload)
+            upload.delete()
+            deleted += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stale uploads.'))
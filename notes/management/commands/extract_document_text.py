@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notes.text_extraction import extract_document_text
+
+
+class Command(BaseCommand):
+    help = 'Extract the per-page text of uploaded documents whose files have changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Number of documents handled per batch.')
+        parser.add_argument('--workers', type=int, default=None, help='Number of worker processes parsing files.')
+        parser.add_argument('--loop', action='store_true', help='Keep running and extract new documents every --interval seconds.')
+        parser.add_argument('--interval', type=int, default=30, help='Seconds between runs when running with --loop.')
+
+    def handle(self, *args, **options):
+        """
+        Extract the pending documents once, or repeatedly when --loop is given.
+        """
+        while True:
+            result = extract_document_text(batch_size=options['batch_size'], workers=options['workers'])
+            if result['documents'] or not options['loop']:
+                self.stdout.write(f"Updated {result['documents']} documents: {result['extracted']} files extracted, "
+                                  f"{result['copied']} reused from documents with the same content.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from notes.models import Document
+from notes.search import update_page_search_vectors, update_search_vectors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the full-text search vectors of all documents and their extracted pages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of documents updated per statement.')
+
+    def handle(self, *args, **options):
+        """
+        Recompute the search vectors in batches of primary keys.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('Document search requires PostgreSQL.')
+
+        batch_size = options['batch_size']
+        updated = 0
+        last_pk = 0
+        while True:
+            pks = list(Document.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            updated += update_search_vectors(pks)
+            update_page_search_vectors(pks)
+            last_pk = pks[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the search vectors of {updated} documents.'))
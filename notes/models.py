@@ -1,4 +1,9 @@
-from django.db import models
+import uuid
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connections, models, transaction
+from django.db.models.functions import Lower
 from django.contrib.auth import get_user_model
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
@@ -7,15 +12,139 @@ from django.urls import reverse
 
 from rest_framework.exceptions import ValidationError
 
+from .storage import ContentAddressedStorage
+
 
 User = get_user_model()
 
+# The maximum number of categories inserted per statement
+INSERT_BATCH_SIZE = 500
+
+class CategoryManager(models.Manager):
+    """
+    Manager for the Category model.
+    """
+
+    def get_or_create_by_names(self, names):
+        """
+        Get the categories with the given names, creating any that do not exist yet.
+
+        Names are matched case-insensitively. All names are looked up with a single query, the missing
+        categories are inserted with a single bulk insert, and names inserted concurrently by another
+        request are skipped by the database and picked up by a second lookup.
+
+        Args:
+            names (list): The category names. Duplicate names (ignoring case) are only used once.
+
+        Returns:
+            list: The categories, in the order their names were first given.
+        """
+        return [category for category, created in self.bulk_get_or_create(names)]
+
+    def bulk_get_or_create(self, names):
+        """
+        Get or create the categories with the given names, reporting which ones were created.
+
+        This is the set-based counterpart of get_or_create(), see get_or_create_by_names.
+
+        Args:
+            names (list): The category names. Duplicate names (ignoring case) are only used once.
+
+        Returns:
+            list: (category, created) tuples, in the order their names were first given.
+        """
+        names_by_lower = {}
+        for name in names:
+            names_by_lower.setdefault(name.lower(), name)
+        if not names_by_lower:
+            return []
+
+        lookup = self.annotate(name_lower=Lower('name'))
+        categories = {category.name_lower: category for category in lookup.filter(name_lower__in=names_by_lower)}
+        created = set()
+
+        missing = [name for name_lower, name in names_by_lower.items() if name_lower not in categories]
+        if missing:
+            # Only the names the insert returns were created here, the rest were inserted concurrently
+            created.update(name.lower() for name in self._insert_missing(missing))
+            categories.update(
+                (category.name_lower, category)
+                for category in lookup.filter(name_lower__in=[name.lower() for name in missing])
+            )
+
+        return [
+            (categories[name_lower], name_lower in created)
+            for name_lower in names_by_lower if name_lower in categories
+        ]
+
+    def _insert_missing(self, names):
+        """
+        Insert categories with the given names, skipping names that exist by now.
+
+        bulk_create(ignore_conflicts=True) does not report which rows were skipped, so the insert is issued with
+        ON CONFLICT DO NOTHING RETURNING, which the functional unique index on lower(name) makes skip existing names.
+
+        Args:
+            names (list): The category names, unique ignoring case.
+
+        Returns:
+            list: The names of the inserted categories.
+        """
+        db_connection = connections[self.db]
+        table = db_connection.ops.quote_name(self.model._meta.db_table)
+        column = db_connection.ops.quote_name(self.model._meta.get_field('name').column)
+        inserted = []
+        with db_connection.cursor() as cursor:
+            for start in range(0, len(names), INSERT_BATCH_SIZE):
+                batch = names[start:start + INSERT_BATCH_SIZE]
+                values = ', '.join(['(%s)'] * len(batch))
+                cursor.execute(f'INSERT INTO {table} ({column}) VALUES {values} ON CONFLICT DO NOTHING RETURNING {column}', batch)
+                inserted.extend(row[0] for row in cursor.fetchall())
+        return inserted
+
+    def delete_by_names(self, names):
+        """
+        Delete the categories with the given names.
+
+        Names are matched case-insensitively. The matching names are read with a single query and the
+        categories (with their document links) are deleted with one set-based delete, all in one transaction.
+
+        Args:
+            names (list): The category names.
+
+        Returns:
+            tuple: The names of the deleted categories as stored, and the given names that matched no category.
+        """
+        names_by_lower = {}
+        for name in names:
+            names_by_lower.setdefault(name.lower(), name)
+        if not names_by_lower:
+            return [], []
+
+        with transaction.atomic():
+            matched = self.annotate(name_lower=Lower('name')).filter(name_lower__in=names_by_lower)
+            deleted = dict(matched.select_for_update().values_list('name_lower', 'name'))
+            if deleted:
+                matched.delete()
+
+        missing = [name for name_lower, name in names_by_lower.items() if name_lower not in deleted]
+        return list(deleted.values()), missing
+
+
 class Category(models.Model):
     """
     Model representing categories for notes.
     """
     name = models.CharField(max_length=100, unique=True)
 
+    objects = CategoryManager()
+
+    class Meta:
+        constraints = [
+            # Category names are unique regardless of case; also backs the case-insensitive name lookups
+            models.UniqueConstraint(Lower('name'), name='notes_category_name_lower_uniq'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -23,13 +152,27 @@ class Document(models.Model):
     """
     Model representing individual notes.
     """
-    title = models.CharField(max_length=200, blank=True)
-    document = models.FileField(upload_to='notes/documents/')
+    title = models.CharField(max_length=200, blank=True, db_index=True)  # Indexed for the duplicate title check and title lookups
+    document = models.FileField(upload_to='notes/documents/', storage=ContentAddressedStorage(), db_index=True)  # Files are shared between documents with identical content, and deleted by notes.orphaned_files
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)  # User who uploaded the notes
     author = models.CharField(max_length=200, blank=True)  # Author name (optional)
     categories = models.ManyToManyField(Category, blank=True)  
+    # Full-text search vector over the title, topics, categories and author, maintained by notes.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Name of the stored file (named after its content digest) whose page text is in DocumentPage, see notes.text_extraction
+    extracted_file = models.CharField(max_length=255, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Backs the case-insensitive `lower(title) IN (...)` lookup of document_urls
+            models.Index(Lower('title'), name='notes_document_title_lower_idx'),
+            # Keyset pagination of a user's documents (students.views.StudentViewSet.student_documents)
+            models.Index(fields=['uploaded_by', 'created_at', 'id'], name='notes_doc_uploader_created_idx'),
+            # Full-text search (notes.search)
+            GinIndex(fields=['search_vector'], name='notes_document_search_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -42,20 +185,76 @@ def set_default_document_title(sender, instance, *args, **kwargs):
         filename = instance.document.name
         instance.title = filename.split('.')[0]  # Use the filename without extension
 
-    # Check if a document with the same title already exists
-    existing_document = Document.objects.filter(title=instance.title).exclude(pk=instance.pk).first()
+    # Check if a document with the same title already exists, fetching its uploader's username in the same query
+    existing_document = (Document.objects.filter(title=instance.title).exclude(pk=instance.pk)
+                         .values('pk', 'title', 'uploaded_by_id', 'uploaded_by__username').first())
     if existing_document:
-        if existing_document.uploaded_by == instance.uploaded_by:
+        if existing_document['uploaded_by_id'] == instance.uploaded_by_id:
             raise ValidationError({'title': 'You have already uploaded a document with the same title.',
-                                   'existing_document_title': existing_document.title,
+                                   'existing_document_title': existing_document['title'],
+                                   'existing_document_id': existing_document['pk'],
                                    })
         else:
+            uploader = existing_document['uploaded_by__username'] or 'a deleted user'
             raise ValidationError({
-                'title': f"A document with the same title was uploaded by {existing_document.uploaded_by.username}.",
-                'existing_document_title': existing_document.title,
+                'title': f"A document with the same title was uploaded by {uploader}.",
+                'existing_document_title': existing_document['title'],
+                'existing_document_id': existing_document['pk'],
             })
 
 
+class DocumentPage(models.Model):
+    """
+    Model representing the extracted text of one page of a document.
+
+    Filled in by the text extraction pipeline (notes.text_extraction) so topics and searches can point to pages.
+    """
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField()
+    text = models.TextField()
+    search_vector = SearchVectorField(null=True, editable=False)  # Maintained by notes.search
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['document', 'page_number'], name='notes_documentpage_document_page_uniq'),
+        ]
+        indexes = [
+            # Full-text search of page text (notes.search)
+            GinIndex(fields=['search_vector'], name='notes_documentpage_search_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.document_id} p. {self.page_number}"
+
+
+class DocumentUpload(models.Model):
+    """
+    Model representing a resumable, chunked document upload in progress.
+
+    Chunks are appended to a partial file in the document storage; once all bytes have been received the
+    upload is finalized into a Document (and optionally a Topic) and this record is deleted.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()  # Total size of the file in bytes
+    offset = models.PositiveBigIntegerField(default=0)  # Number of bytes received so far
+    checksum = models.CharField(max_length=64, blank=True)  # Optional SHA-256 of the whole file, checked on finalize
+
+    # Document and topic details used when the upload is finalized
+    title = models.CharField(max_length=200, blank=True)
+    author = models.CharField(max_length=200, blank=True)
+    categories = models.TextField(blank=True)  # Comma-separated category names
+    topic_name = models.CharField(max_length=200, blank=True)
+    start_page = models.PositiveIntegerField(null=True, blank=True)
+    end_page = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
 
 class Topic(models.Model):
     """
@@ -69,6 +268,12 @@ class Topic(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # A document has at most one topic with a given name, see TopicViewSet.create_topic
+            models.UniqueConstraint(fields=['document', 'name'], name='notes_topic_document_name_uniq'),
+        ]
+
     def __str__(self):
         return self.name
 
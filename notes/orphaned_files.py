@@ -0,0 +1,41 @@
+# notes/orphaned_files.py
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+
+from .models import Document
+
+
+def delete_orphaned_document_files(grace_period=None, batch_size=1000):
+    """
+    Delete the stored document files that no document references any more.
+
+    Files become unreferenced when their last document is deleted, when a document's file is replaced, or
+    when the transaction that stored them rolls back. Only files idle for longer than the grace period are
+    deleted, so a file stored or reused by an upload whose row has not been committed yet is kept (see
+    notes.storage.ContentAddressedStorage.delete_idle_blob).
+
+    Args:
+        grace_period (timedelta, optional): How long a file must have been idle
+            (default settings.NOTES_ORPHANED_FILE_GRACE_HOURS).
+        batch_size (int): The number of files checked against the documents per query.
+
+    Returns:
+        int: The number of files deleted.
+    """
+    if grace_period is None:
+        grace_period = timedelta(hours=getattr(settings, 'NOTES_ORPHANED_FILE_GRACE_HOURS', 24))
+    field = Document._meta.get_field('document')
+    cutoff = time.time() - grace_period.total_seconds()
+
+    idle_names = [name for name, modified in field.storage.list_blobs(field.upload_to) if modified < cutoff]
+    deleted = 0
+    for start in range(0, len(idle_names), batch_size):
+        names = idle_names[start:start + batch_size]
+        referenced = set(Document.objects.filter(document__in=names).values_list('document', flat=True))
+        for name in names:
+            if name not in referenced and field.storage.delete_idle_blob(name, cutoff):
+                deleted += 1
+    return deleted
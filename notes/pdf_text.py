@@ -0,0 +1,29 @@
+# notes/pdf_text.py
+#
+# Runs inside the text extraction worker processes (see notes/text_extraction.py), so it must not touch
+# Django models or the database.
+
+try:
+    import pypdf
+except ImportError:  # pypdf is only needed where text extraction runs
+    pypdf = None
+
+
+def extract_pdf_pages(path):
+    """
+    Extract the text of a PDF file page by page.
+
+    Pages are parsed one at a time, so only one page of content is decoded in memory at once.
+
+    Args:
+        path (str): The path of the PDF file.
+
+    Returns:
+        list: The text of each page, in page order.
+    """
+    if pypdf is None:
+        raise RuntimeError('Extracting document text requires the pypdf package.')
+
+    reader = pypdf.PdfReader(path)
+    # Postgres text columns cannot store NUL characters
+    return [(page.extract_text() or '').replace('\x00', '') for page in reader.pages]
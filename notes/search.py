@@ -0,0 +1,143 @@
+# notes/search.py
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import OuterRef, QuerySet, Subquery
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+
+from .models import Category, Document, DocumentPage, Topic
+
+
+def get_search_config():
+    """
+    Get the Postgres text search configuration used to build and query the search vectors.
+    """
+    return getattr(settings, 'NOTES_SEARCH_CONFIG', 'english')
+
+
+def build_search_vector():
+    """
+    Build the expression computing the search vector of a document.
+
+    The title is weighted highest, then the names of the document's topics, then its category names and author.
+    """
+    config = get_search_config()
+    topic_names = (Topic.objects.filter(document=OuterRef('pk')).order_by()
+                   .values('document').annotate(names=StringAgg('name', ' ')).values('names'))
+    category_names = (Document.categories.through.objects.filter(document=OuterRef('pk')).order_by()
+                      .values('document').annotate(names=StringAgg('category__name', ' ')).values('names'))
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(Subquery(topic_names), weight='B', config=config)
+        + SearchVector(Subquery(category_names), weight='C', config=config)
+        + SearchVector('author', weight='C', config=config)
+    )
+
+
+def update_search_vectors(documents):
+    """
+    Recompute the search vectors of the given documents with a single UPDATE.
+
+    Does nothing on databases other than Postgres.
+
+    Args:
+        documents (QuerySet or iterable): The documents, or their ids.
+
+    Returns:
+        int: The number of documents updated.
+    """
+    if connection.vendor != 'postgresql':
+        return 0
+    if not isinstance(documents, QuerySet):
+        documents = Document.objects.filter(pk__in=list(documents))
+    return documents.update(search_vector=build_search_vector())
+
+
+def update_page_search_vectors(document_ids):
+    """
+    Recompute the search vectors of the extracted pages of the given documents with a single UPDATE.
+
+    Does nothing on databases other than Postgres.
+
+    Args:
+        document_ids (iterable): The ids of the documents.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    DocumentPage.objects.filter(document_id__in=list(document_ids)).update(
+        search_vector=SearchVector('text', config=get_search_config())
+    )
+
+
+def document_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'author'} & set(update_fields):
+        update_search_vectors([instance.pk])
+
+
+def topic_changed(sender, instance, **kwargs):
+    update_search_vectors([instance.document_id])
+
+
+def category_saved(sender, instance, created=False, **kwargs):
+    if not created:
+        # A renamed category changes the vectors of all its documents
+        update_search_vectors(Document.objects.filter(categories=instance))
+
+
+def _category_document_ids(categories):
+    links = Document.categories.through.objects.filter(category__in=categories)
+    return set(links.values_list('document_id', flat=True))
+
+
+def _deletion_batch(instance, origin):
+    # A QuerySet.delete() of categories is handled once for all of them, through the queryset
+    if isinstance(origin, QuerySet) and origin.model is Category:
+        return origin, origin.values('pk')
+    return instance, [instance.pk]
+
+
+def category_deleting(sender, instance, origin=None, **kwargs):
+    # The link rows are deleted without m2m_changed, so remember the documents before they are gone
+    batch, categories = _deletion_batch(instance, origin)
+    if not hasattr(batch, '_search_document_ids'):
+        batch._search_document_ids = _category_document_ids(categories)
+
+
+def category_deleted(sender, instance, origin=None, **kwargs):
+    batch, categories = _deletion_batch(instance, origin)
+    document_ids = batch.__dict__.pop('_search_document_ids', None)
+    if document_ids:
+        update_search_vectors(document_ids)
+
+
+def document_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # category.document_set.clear() does not report which documents were removed
+        instance._search_document_ids = _category_document_ids([instance.pk])
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_search_vectors([instance.pk])
+    elif action == 'post_clear':
+        category_deleted(sender, instance)
+    elif pk_set:
+        # The change was made from the category side, e.g. category.document_set.add(document)
+        update_search_vectors(pk_set)
+
+
+def connect_signals():
+    """
+    Connect the signal handlers that keep the search vectors up to date as documents change.
+
+    QuerySet.update() and bulk_create() send no signals; call update_search_vectors() after using them.
+    """
+    post_save.connect(document_saved, sender=Document)
+    post_save.connect(topic_changed, sender=Topic)
+    post_delete.connect(topic_changed, sender=Topic)
+    post_save.connect(category_saved, sender=Category)
+    pre_delete.connect(category_deleting, sender=Category)
+    post_delete.connect(category_deleted, sender=Category)
+    m2m_changed.connect(document_categories_changed, sender=Document.categories.through)
@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from django.urls import reverse
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
-from .models import Category, Document, Topic
+from .models import Category, Document, DocumentUpload, Topic
+from .url_templates import URLTemplate
 
 User = get_user_model()
 
@@ -18,6 +19,33 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = '__all__'
 
+    def validate_name(self, value):
+        """
+        Check that no other category has the same name, ignoring case (see notes_category_name_lower_uniq).
+
+        Args:
+            value (str): The category name.
+
+        Returns:
+            str: The validated name.
+        """
+        categories = Category.objects.filter(name__iexact=value)
+        if self.instance is not None:
+            categories = categories.exclude(pk=self.instance.pk)
+        if categories.exists():
+            raise ValidationError('A category with this name already exists.')
+        return value
+
+
+class CategoryBulkCreateSerializer(serializers.Serializer):
+    """
+    Serializer class for one item of a bulk category import.
+
+    Only validates the name: uniqueness is resolved by the database in CategoryManager.bulk_get_or_create,
+    so existing names are reported instead of failing the whole batch.
+    """
+    name = serializers.CharField(max_length=Category._meta.get_field('name').max_length)
+
 
 class DocumentSerializer(serializers.ModelSerializer):
     """
@@ -30,9 +58,38 @@ class DocumentSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Document
-        fields = '__all__'
+        exclude = ('search_vector', 'extracted_file')
+
+
+class DocumentUploadSerializer(serializers.ModelSerializer):
+    """
+    Serializer class for DocumentUpload model.
+
+    Validates the details of a new chunked upload and reports its progress.
+    """
+    class Meta:
+        model = DocumentUpload
+        exclude = ('uploaded_by',)
+        read_only_fields = ('offset', 'created_at', 'updated_at')
+
+    def validate_size(self, value):
+        max_size = getattr(settings, 'NOTES_MAX_UPLOAD_SIZE', 1024 ** 3)
+        if value > max_size:
+            raise ValidationError(f'The file must not be larger than {max_size} bytes.')
+        return value
+
+    def validate_checksum(self, value):
+        value = value.strip().lower()
+        if value and (len(value) != 64 or any(c not in '0123456789abcdef' for c in value)):
+            raise ValidationError('The checksum must be a SHA-256 hex digest.')
+        return value
+
+    def validate(self, attrs):
+        # The topic is created on finalize, when the file can no longer be sent again, so check it up front
+        if attrs.get('topic_name') and (attrs.get('start_page') is None or attrs.get('end_page') is None):
+            raise ValidationError({'topic_name': 'start_page and end_page are required to create a topic.'})
+        return attrs
 
-    
 
 class TopicSerializer(serializers.ModelSerializer):
     """
@@ -53,14 +110,27 @@ class TopicSerializer(serializers.ModelSerializer):
         """
         Get the download URL for the associated document.
 
+        The URL route is resolved once per serializer context (i.e. once per request) and reused for every topic.
+
         Args:
             instance: The Topic instance.
 
         Returns:
             str: The absolute URL for downloading the associated document.
         """
-        # Assuming you have a URL pattern named 'download-document-by-id'
-        document_download_url = reverse('download-document-by-id', args=[instance.document.pk])
-        return self.context['request'].build_absolute_uri(document_download_url)
+        url_template = self.context.get('document_download_url_template')
+        if url_template is None:
+            url_template = URLTemplate(self.context['request'], 'download-document-by-id')
+            self.context['document_download_url_template'] = url_template
+        return url_template.format(instance.document_id)
 
-    
+
+class TopicCreateSerializer(TopicSerializer):
+    """
+    Serializer class for TopicViewSet.create_topic.
+
+    The document and uploader are resolved by the view and passed to save(), so they are not looked up again
+    during validation.
+    """
+    class Meta(TopicSerializer.Meta):
+        read_only_fields = ('document', 'uploaded_by')
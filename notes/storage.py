@@ -0,0 +1,167 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+# Suffix of files moved aside by the orphaned file sweep while it decides whether to delete them
+DELETING_SUFFIX = '.deleting'
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that stores each distinct file content only once.
+
+    Uploads are streamed in chunks into a temporary file while being hashed with SHA-256, and then moved to
+    `<upload_to>/<first two digest characters>/<digest><extension>`. Uploads that are already on disk
+    (large multipart uploads and finalized chunked uploads) are hashed in place and moved, or hard linked when
+    the caller keeps the original, without a copy. If a file with the same digest already
+    exists, the upload is discarded and the existing file is reused, so identical documents uploaded under
+    different titles share one file on disk.
+
+    Because files are shared, they are never deleted with their rows. Unreferenced files are removed by a
+    sweep once they have been idle for a grace period (see notes.orphaned_files). Reusing an existing file
+    refreshes its modification time, and the sweep moves a file aside before checking that time again, so a
+    file reused by an upload that has not committed yet is never deleted (see delete_idle_blob).
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save, so the upload name never needs de-duplicating
+        return name
+
+    def _save(self, name, content):
+        directory = os.path.dirname(name)
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # The upload is already on disk: hash it in place and move it instead of copying it
+            return self._save_file_on_disk(directory, name, content)
+
+        hasher = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.path(directory), suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    hasher.update(chunk)
+                    temp_file.write(chunk)
+
+            blob_name, blob_path = self._get_blob(directory, name, hasher.hexdigest())
+            if self._reuse_blob(blob_path):
+                os.remove(temp_path)  # The same content is already stored
+            else:
+                os.replace(temp_path, blob_path)
+                self._set_permissions(blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        return blob_name
+
+    def _save_file_on_disk(self, directory, name, content):
+        hasher = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            hasher.update(chunk)
+
+        blob_name, blob_path = self._get_blob(directory, name, hasher.hexdigest())
+        if not self._reuse_blob(blob_path):
+            try:
+                if getattr(content, 'keep_temporary_file', False):
+                    os.link(content.temporary_file_path(), blob_path)  # Shares the data without copying it
+                else:
+                    file_move_safe(content.temporary_file_path(), blob_path)
+            except FileExistsError:
+                self._reuse_blob(blob_path)  # Stored concurrently by another upload with the same content
+                return blob_name
+            os.utime(blob_path)  # A moved or linked file keeps the time of its last write, which may be old
+            self._set_permissions(blob_path)
+        return blob_name
+
+    def _reuse_blob(self, blob_path):
+        """
+        Mark an existing file as just used, so the orphaned file sweep keeps it.
+
+        Returns:
+            bool: Whether the file exists. It may have been deleted or moved aside by the sweep meanwhile,
+            in which case the caller stores its own copy.
+        """
+        try:
+            os.utime(blob_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _get_blob(self, directory, name, digest):
+        extension = os.path.splitext(name)[1].lower()
+        blob_name = os.path.join(directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+        blob_path = self.path(blob_name)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        return blob_name, blob_path
+
+    def _set_permissions(self, blob_path):
+        if self.file_permissions_mode is not None:
+            os.chmod(blob_path, self.file_permissions_mode)
+
+    def list_blobs(self, directory):
+        """
+        List the stored files under a directory, along with their modification times.
+
+        Files left moved aside by an interrupted sweep are moved back first, so they are checked again.
+
+        Args:
+            directory (str): The upload directory, e.g. 'notes/documents/'.
+
+        Returns:
+            list: (name, modification timestamp) for every file.
+        """
+        blobs = []
+        root = self.path(directory)
+        for dirpath, dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                if filename.endswith(DELETING_SUFFIX):
+                    restored_path = path[:-len(DELETING_SUFFIX)]
+                    if not os.path.exists(restored_path):
+                        os.replace(path, restored_path)
+                    path = restored_path
+                try:
+                    modified = os.stat(path).st_mtime
+                except FileNotFoundError:
+                    continue
+                name = os.path.relpath(path, self.location).replace('\\', '/')
+                blobs.append((name, modified))
+        return blobs
+
+    def delete_idle_blob(self, name, cutoff):
+        """
+        Delete a stored file unless it was used after `cutoff`.
+
+        The file is first moved aside, which makes uploads that try to reuse it store their own copy, and its
+        modification time is checked again: if an upload reused it in the meantime, it is moved back.
+
+        Args:
+            name (str): The name of the file.
+            cutoff (float): The timestamp after which a use keeps the file.
+
+        Returns:
+            bool: Whether the file was deleted.
+        """
+        path = self.path(name)
+        aside_path = path + DELETING_SUFFIX
+        try:
+            os.rename(path, aside_path)
+        except FileNotFoundError:
+            return False
+        if os.stat(aside_path).st_mtime >= cutoff:
+            os.replace(aside_path, path)  # Reused meanwhile; any copy stored since has the same content
+            return False
+        os.remove(aside_path)
+        return True
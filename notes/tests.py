@@ -1,3 +1,607 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.db import IntegrityError, connection
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import NoReverseMatch, reverse
+from django.contrib.auth import get_user_model
+
+from notes.models import Category, Document, DocumentPage, DocumentUpload, Topic, set_default_document_title
+from notes.orphaned_files import delete_orphaned_document_files
+from notes.text_extraction import extract_document_text
+from notes.uploads import get_part_path
+from notes.url_templates import URLTemplate
+
+User = get_user_model()
+
+
+def make_pdf(pages):
+    """
+    Build a minimal PDF with one line of text on each page.
+    """
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in pages:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f'{number} 0 obj\n{body}\nendobj\n'.encode()
+    xref = len(pdf)
+    pdf += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    pdf += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode()
+    pdf += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return pdf
+
+
+class MediaRootTestCase(TestCase):
+    """
+    Base test case that stores uploaded files in a temporary MEDIA_ROOT.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username='testuser', email='test@example.com', password='testpass', first_name='Test', last_name='User')
+
+
+# Tests for the Category model
+class CategoryManagerTestCase(TestCase):
+    """
+    Test case for CategoryManager.
+    """
+    def test_get_or_create_by_names(self):
+        """
+        Test that categories are resolved case-insensitively with a constant number of queries.
+        """
+        Category.objects.create(name='Mathematics')
+        names = ['mathematics', 'Physics', 'physics', 'Chemistry']
+
+        with self.assertNumQueries(3):
+            categories = Category.objects.get_or_create_by_names(names)
+
+        self.assertEqual([category.name for category in categories], ['Mathematics', 'Physics', 'Chemistry'])
+        self.assertEqual(Category.objects.count(), 3)
+
+        with self.assertNumQueries(1):
+            categories = Category.objects.get_or_create_by_names(['PHYSICS', 'chemistry'])
+        self.assertEqual([category.name for category in categories], ['Physics', 'Chemistry'])
+
+    def test_bulk_create_endpoint(self):
+        """
+        Test that bulk_create skips existing names and reports the status of each category.
+        """
+        Category.objects.create(name='Mathematics')
+
+        with self.assertNumQueries(3):
+            response = APIClient().post(reverse('category-bulk-create'), [{'name': 'mathematics'}, {'name': 'Music'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(item['name'], item['status']) for item in response.data], [('Mathematics', 'existing'), ('Music', 'created')])
+
+    def test_create_duplicate_name_in_different_case(self):
+        """
+        Test that creating or renaming a category onto an existing name in a different case is rejected.
+        """
+        Category.objects.create(name='Math')
+        physics = Category.objects.create(name='Physics')
+        client = APIClient()
+
+        response = client.post(reverse('category-list'), {'name': 'math'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', response.data)
+
+        response = client.put(reverse('category-detail', args=[physics.pk]), {'name': 'MATH'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = client.put(reverse('category-detail', args=[physics.pk]), {'name': 'physics'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Category.objects.count(), 2)
+
+    def test_bulk_get_or_create_concurrent_insert(self):
+        """
+        Test that a name inserted by another request after the lookup is reported as existing.
+        """
+        insert_missing = Category.objects._insert_missing
+
+        def insert_after_concurrent_request(names):
+            Category.objects.create(name='music')
+            return insert_missing(names)
+
+        with patch.object(Category.objects, '_insert_missing', side_effect=insert_after_concurrent_request):
+            result = Category.objects.bulk_get_or_create(['Music', 'Art'])
+
+        self.assertEqual([(category.name, created) for category, created in result], [('music', False), ('Art', True)])
+
+    def test_delete_by_names(self):
+        """
+        Test that categories are deleted case-insensitively with a constant number of queries.
+        """
+        Category.objects.bulk_create([Category(name=name) for name in ['Mathematics', 'Physics', 'Chemistry']])
+
+        # Savepoint, match, delete collection, their documents (for the search vectors), link delete,
+        # category delete, release
+        with self.assertNumQueries(7):
+            deleted, missing = Category.objects.delete_by_names(['mathematics', 'PHYSICS', 'Biology'])
+
+        self.assertEqual(sorted(deleted), ['Mathematics', 'Physics'])
+        self.assertEqual(missing, ['Biology'])
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['Chemistry'])
+
+
+# Tests for the Document model
+class DocumentTitleTestCase(MediaRootTestCase):
+    """
+    Test case for the duplicate title check in the Document presave signal.
+    """
+    def test_duplicate_title(self):
+        """
+        Test that a duplicate title is reported, with its uploader, using a single query.
+        """
+        existing_document = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'%PDF'), uploaded_by=self.user)
+        other_user = User.objects.create_user(username='otheruser', email='other@example.com', password='testpass', first_name='Other', last_name='User')
+        document = Document(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'%PDF'), uploaded_by=other_user)
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValidationError) as context:
+                set_default_document_title(Document, document)
+
+        self.assertEqual(context.exception.detail['title'], 'A document with the same title was uploaded by testuser.')
+        self.assertEqual(int(context.exception.detail['existing_document_id']), existing_document.pk)
+
+
+# Tests for DocumentViewSet
+class DocumentDownloadTestCase(MediaRootTestCase):
+    """
+    Test case for range and conditional document downloads.
+    """
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.document = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'0123456789'), uploaded_by=self.user)
+        self.url = reverse('download-document-by-id', args=[self.document.pk])
+
+    def test_full_download(self):
+        """
+        Test that a full download carries validators.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('ETag', response)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_download(self):
+        """
+        Test that byte ranges are answered with 206 Partial Content.
+        """
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5'})
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=-3'})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=20-'})
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+        # An invalid range is ignored and the whole file is served
+        response = self.client.get(self.url, headers={'Range': 'bytes=5-2'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+
+    def test_range_of_empty_file(self):
+        """
+        Test that a range request for an empty file is answered with 416.
+        """
+        empty = Document.objects.create(title='Empty', document=SimpleUploadedFile('empty.pdf', b''), uploaded_by=self.user)
+        response = self.client.get(reverse('download-document-by-id', args=[empty.pk]), headers={'Range': 'bytes=-3'})
+        self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(response['Content-Range'], 'bytes */0')
+
+    def test_conditional_download(self):
+        """
+        Test that a matching If-None-Match is answered with 304 Not Modified.
+        """
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(NOTES_DOWNLOAD_OFFLOAD='x-accel-redirect', NOTES_X_ACCEL_REDIRECT_PREFIX='/protected/')
+    def test_offloaded_download(self):
+        """
+        Test that the file transfer is handed off to the web server when offloading is enabled.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/' + self.document.document.name)
+
+
+class DocumentURLsTestCase(MediaRootTestCase):
+    """
+    Test case for the document_urls endpoint.
+    """
+    def test_document_urls_by_title(self):
+        """
+        Test that titles are matched case-insensitively in one query and the links match reverse().
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        document = Document.objects.create(title='Lecture 1: Limits & Sets', document=SimpleUploadedFile('lecture1.pdf', b'%PDF 1'), uploaded_by=self.user)
+        Document.objects.create(title='Lecture 2', document=SimpleUploadedFile('lecture2.pdf', b'%PDF 2'), uploaded_by=self.user)
+
+        with self.assertNumQueries(1):
+            response = client.get(reverse('document-document-urls'), {'titles': 'lecture 1: limits & sets, LECTURE 3'})
+
+        self.assertEqual(response.data, [{
+            'title': document.title,
+            'url': reverse('document-detail', args=[document.pk]),
+            'download_url_by_id': 'http://testserver' + reverse('download-document-by-id', args=[document.pk]),
+            'download_url_by_title': 'http://testserver' + reverse('download-document-by-title', args=[document.title]),
+        }])
+
+    def test_url_template_rejects_what_reverse_rejects(self):
+        """
+        Test that an argument the route's converter rejects raises NoReverseMatch instead of building a broken link.
+        """
+        url_template = URLTemplate(RequestFactory().get('/'), 'download-document-by-title')
+
+        self.assertEqual(url_template.format('Notes?'), 'http://testserver' + reverse('download-document-by-title', args=['Notes?']))
+        with self.assertRaises(NoReverseMatch):
+            url_template.format('Limits/Sets')
+
+
+class DocumentStorageTestCase(MediaRootTestCase):
+    """
+    Test case for the content-addressed document storage.
+    """
+    def test_identical_documents_share_a_file(self):
+        """
+        Test that identical uploads are stored once and the file is kept until its last document is deleted.
+        """
+        first = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'%PDF same'), uploaded_by=self.user)
+        second = Document.objects.create(title='Lecture 1 copy', document=SimpleUploadedFile('copy.pdf', b'%PDF same'), uploaded_by=self.user)
+        other = Document.objects.create(title='Lecture 2', document=SimpleUploadedFile('lecture2.pdf', b'%PDF other'), uploaded_by=self.user)
+
+        self.assertEqual(first.document.name, second.document.name)
+        self.assertNotEqual(first.document.name, other.document.name)
+        storage = first.document.storage
+
+        first.delete()
+        self.assertEqual(delete_orphaned_document_files(timedelta(0)), 0)
+        self.assertTrue(storage.exists(second.document.name))
+
+        second.delete()
+        self.assertTrue(storage.exists(second.document.name))  # Files are only deleted by the sweep
+        self.assertEqual(delete_orphaned_document_files(timedelta(0)), 1)
+        self.assertFalse(storage.exists(second.document.name))
+        self.assertTrue(storage.exists(other.document.name))
+
+    def test_sweep_keeps_recently_used_files(self):
+        """
+        Test that replaced files are swept once idle, and that reusing an idle file protects it from the sweep.
+        """
+        document = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'%PDF old'), uploaded_by=self.user)
+        old_name = document.document.name
+        storage = document.document.storage
+        document.document = SimpleUploadedFile('lecture1.pdf', b'%PDF new')
+        document.save()
+
+        # The replaced file is unreferenced but still within the grace period
+        self.assertEqual(delete_orphaned_document_files(timedelta(hours=1)), 0)
+
+        # Once idle, it is deleted, unless an upload reuses it first
+        two_hours_ago = time.time() - 7200
+        os.utime(storage.path(old_name), (two_hours_ago, two_hours_ago))
+        reused_name = storage.save('notes/documents/copy.pdf', ContentFile(b'%PDF old'))
+        self.assertEqual(reused_name, old_name)
+        self.assertEqual(delete_orphaned_document_files(timedelta(hours=1)), 0)
+        self.assertTrue(storage.exists(old_name))
+
+        os.utime(storage.path(old_name), (two_hours_ago, two_hours_ago))
+        self.assertEqual(delete_orphaned_document_files(timedelta(hours=1)), 1)
+        self.assertFalse(storage.exists(old_name))
+        self.assertTrue(storage.exists(document.document.name))
+
+
+class ChunkedUploadTestCase(MediaRootTestCase):
+    """
+    Test case for resumable, chunked document uploads.
+    """
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.content = b'%PDF chunked document content'
+
+    def start_upload(self, **data):
+        data = {'filename': 'lecture1.pdf', 'size': len(self.content), **data}
+        response = self.client.post('/notes/documents/uploads/', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return f"/notes/documents/uploads/{response.data['id']}/"
+
+    def put_chunk(self, url, chunk, offset, **headers):
+        return self.client.generic('PUT', url, chunk, content_type='application/offset+octet-stream',
+                                   headers={'Upload-Offset': str(offset), **headers})
+
+    def test_chunked_upload(self):
+        """
+        Test that chunks are appended, progress can be queried and finalizing creates the document and topic.
+        """
+        url = self.start_upload(title='Lecture 1', categories='Maths, Physics', topic_name='Limits', start_page=1, end_page=3,
+                                checksum=hashlib.sha256(self.content).hexdigest())
+
+        response = self.put_chunk(url, self.content[:10], 0)
+        self.assertEqual(response.data['offset'], 10)
+        self.assertEqual(self.client.get(url).data['offset'], 10)
+
+        # Resending from a stale offset is rejected with the offset to resume from
+        response = self.put_chunk(url, self.content[:10], 0)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], 10)
+
+        response = self.put_chunk(url, self.content[10:], 10)
+        self.assertEqual(response.data['offset'], len(self.content))
+
+        part_path = get_part_path(DocumentUpload.objects.get())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url + 'finalize/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertFalse(os.path.exists(part_path))
+
+        document = Document.objects.get(title='Lecture 1')
+        with document.document.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+        self.assertEqual(sorted(category.name for category in document.categories.all()), ['Maths', 'Physics'])
+        self.assertTrue(Topic.objects.filter(name='Limits', document=document).exists())
+        self.assertFalse(DocumentUpload.objects.exists())
+
+    def test_chunk_checksum_mismatch(self):
+        """
+        Test that a chunk not matching its checksum is discarded.
+        """
+        url = self.start_upload()
+        response = self.put_chunk(url, self.content[:10], 0, **{'Upload-Checksum': 'sha256 ' + '0' * 64})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['offset'], 0)
+
+        checksum = hashlib.sha256(self.content[:10]).hexdigest()
+        response = self.put_chunk(url, self.content[:10], 0, **{'Upload-Checksum': f'sha256 {checksum}'})
+        self.assertEqual(response.data['offset'], 10)
+
+    def test_failed_finalize_can_be_retried(self):
+        """
+        Test that the partial file is kept when finalizing fails after the document was stored.
+        """
+        url = self.start_upload(title='Lecture 1', topic_name='Limits', start_page=1, end_page=3)
+        self.put_chunk(url, self.content, 0)
+        part_path = get_part_path(DocumentUpload.objects.get())
+
+        self.client.raise_request_exception = False
+        with patch('notes.views.Topic.objects.create', side_effect=RuntimeError('Database unavailable')):
+            response = self.client.post(url + 'finalize/')
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertTrue(os.path.exists(part_path))
+
+        response = self.client.post(url + 'finalize/')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        with Document.objects.get(title='Lecture 1').document.open('rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_declared_size_is_limited(self):
+        """
+        Test that an upload larger than settings.NOTES_MAX_UPLOAD_SIZE cannot be started.
+        """
+        with override_settings(NOTES_MAX_UPLOAD_SIZE=10):
+            response = self.client.post('/notes/documents/uploads/', {'filename': 'lecture1.pdf', 'size': 11}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('size', response.data)
+
+    def test_finalize_incomplete_upload(self):
+        """
+        Test that an upload cannot be finalized before all bytes are received.
+        """
+        url = self.start_upload()
+        self.put_chunk(url, self.content[:10], 0)
+        response = self.client.post(url + 'finalize/')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Document.objects.exists())
+
+
+class CreateTopicTestCase(MediaRootTestCase):
+    """
+    Test case for TopicViewSet.create_topic.
+    """
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('topic-create-topic')
+        self.document = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', b'%PDF'), uploaded_by=self.user)
+
+    def test_create_topic_for_existing_document(self):
+        """
+        Test that a topic is created for a document found by title with a fixed number of queries.
+        """
+        data = {'name': 'Limits', 'start_page': 1, 'end_page': 3, 'document_title': 'Lecture 1'}
+        # Savepoint, document lookup, savepoint, topic insert, release, release
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, data)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['document'], self.document.pk)
+        self.assertEqual(response.data['uploaded_by'], self.user.pk)
+
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('exists', response.data)
+        self.assertEqual(Topic.objects.count(), 1)
+
+    def test_create_topic_with_uploaded_document(self):
+        """
+        Test that an uploaded document is created, or replaced by the existing document with the same title.
+        """
+        data = {'name': 'Limits', 'start_page': 1, 'end_page': 3, 'uploaded_document': SimpleUploadedFile('lecture2.pdf', b'%PDF 2')}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(Document.objects.get(pk=response.data['document']).title, 'lecture2')
+
+        data = {'name': 'Limits', 'start_page': 1, 'end_page': 3, 'uploaded_document': SimpleUploadedFile('Lecture 1.pdf', b'%PDF 3')}
+        response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(response.data['document'], self.document.pk)
+        self.assertEqual(Document.objects.count(), 2)
+
+    def test_document_integrity_error_is_not_reported_as_duplicate_topic(self):
+        """
+        Test that an integrity error while creating the document is not reported as a duplicate topic.
+        """
+        data = {'name': 'Limits', 'start_page': 1, 'end_page': 3, 'uploaded_document': SimpleUploadedFile('lecture2.pdf', b'%PDF 2')}
+        with patch('notes.views.TopicViewSet.create_document', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                self.client.post(self.url, data)
+        self.assertEqual(Topic.objects.count(), 0)
+
+
+class TopicListTestCase(MediaRootTestCase):
+    """
+    Test case for the topic listing.
+    """
+    def test_list_topics(self):
+        """
+        Test that a page of topics takes two queries regardless of the number of documents.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        for number in range(5):
+            document = Document.objects.create(title=f'Lecture {number}', document=SimpleUploadedFile(f'lecture{number}.pdf', f'%PDF {number}'.encode()), uploaded_by=self.user)
+            Topic.objects.create(name=f'Topic {number}', start_page=1, end_page=2, document=document, uploaded_by=self.user)
+
+        with self.assertNumQueries(2) as context:
+            response = client.get(reverse('topic-list'), {'page_size': 3})
+
+        # Only topic columns are read, not the document's search vector or the uploader's password hash
+        page_query = context.captured_queries[-1]['sql']
+        self.assertNotIn('search_vector', page_query)
+        self.assertNotIn('password', page_query)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 3)
+        topic = response.data['results'][0]
+        self.assertEqual(topic['document_download_url'], 'http://testserver' + reverse('download-document-by-id', args=[topic['document']]))
+
+
+class TextExtractionTestCase(MediaRootTestCase):
+    """
+    Test case for the per-page text extraction of documents.
+    """
+    def test_extract_document_text(self):
+        """
+        Test that pages are extracted once per distinct file and unchanged files are skipped.
+        """
+        content = make_pdf(['Limits of sequences', '', 'Derivatives'])
+        first = Document.objects.create(title='Lecture 1', document=SimpleUploadedFile('lecture1.pdf', content), uploaded_by=self.user)
+        second = Document.objects.create(title='Lecture 1 copy', document=SimpleUploadedFile('copy.pdf', content), uploaded_by=self.user)
+        Document.objects.create(title='Slides', document=SimpleUploadedFile('slides.pptx', b'PK'), uploaded_by=self.user)
+
+        result = extract_document_text(workers=1)
+        self.assertEqual(result, {'extracted': 1, 'copied': 0, 'documents': 3})
+        self.assertEqual(list(first.pages.values_list('page_number', 'text')), [(1, 'Limits of sequences'), (3, 'Derivatives')])
+        self.assertEqual(list(second.pages.values_list('page_number', 'text')), [(1, 'Limits of sequences'), (3, 'Derivatives')])
+
+        # Nothing has changed, so nothing is extracted again
+        self.assertEqual(extract_document_text(workers=1)['documents'], 0)
+
+        # A new upload of known content reuses the extracted pages
+        third = Document.objects.create(title='Lecture 1 again', document=SimpleUploadedFile('again.pdf', content), uploaded_by=self.user)
+        self.assertEqual(extract_document_text(workers=1), {'extracted': 0, 'copied': 1, 'documents': 1})
+        self.assertEqual(third.pages.count(), 2)
+        self.assertEqual(DocumentPage.objects.count(), 6)
+
+
+class SearchVectorSignalsTestCase(MediaRootTestCase):
+    """
+    Test case for the search vector updates sent when categories are removed from documents.
+    """
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Calculus')
+        self.documents = [
+            Document.objects.create(title=f'Lecture {number}', document=SimpleUploadedFile(f'lecture{number}.pdf', f'%PDF {number}'.encode()), uploaded_by=self.user)
+            for number in range(2)
+        ]
+        for document in self.documents:
+            document.categories.add(self.category)
+
+    def assert_updates_documents(self, update_search_vectors):
+        update_search_vectors.assert_called_once()
+        self.assertEqual(sorted(update_search_vectors.call_args.args[0]), [document.pk for document in self.documents])
+
+    def test_deleted_category_updates_its_documents(self):
+        """
+        Test that deleting a category, alone or by name, updates the vectors of its former documents.
+        """
+        with patch('notes.search.update_search_vectors') as update_search_vectors:
+            Category.objects.delete_by_names(['CALCULUS'])
+        self.assert_updates_documents(update_search_vectors)
+
+        category = Category.objects.create(name='Algebra')
+        for document in self.documents:
+            document.categories.add(category)
+        self.category = category
+        with patch('notes.search.update_search_vectors') as update_search_vectors:
+            category.delete()
+        self.assert_updates_documents(update_search_vectors)
+
+    def test_cleared_category_updates_its_documents(self):
+        """
+        Test that clearing the documents of a category from the category side updates their vectors.
+        """
+        with patch('notes.search.update_search_vectors') as update_search_vectors:
+            self.category.document_set.clear()
+        self.assert_updates_documents(update_search_vectors)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Document search requires PostgreSQL.')
+class DocumentSearchTestCase(MediaRootTestCase):
+    """
+    Test case for the full-text document search.
+    """
+    def test_search(self):
+        """
+        Test that search vectors follow topic and category changes and results are ranked and filterable.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('document-search')
+        lecture = Document.objects.create(title='Calculus lecture', document=SimpleUploadedFile('lecture.pdf', b'%PDF 1'), uploaded_by=self.user)
+        notes = Document.objects.create(title='Revision notes', document=SimpleUploadedFile('notes.pdf', b'%PDF 2'), uploaded_by=self.user)
+        Topic.objects.create(name='Calculus limits', start_page=1, end_page=2, document=notes, uploaded_by=self.user)
+        notes.categories.add(Category.objects.create(name='Mathematics'))
+
+        response = client.get(url, {'q': 'calculus'})
+        self.assertEqual([item['id'] for item in response.data['results']], [lecture.pk, notes.pk])
+
+        response = client.get(url, {'q': 'calculus', 'categories': 'mathematics'})
+        self.assertEqual([item['id'] for item in response.data['results']], [notes.pk])
@@ -0,0 +1,149 @@
+# notes/text_extraction.py
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import transaction, close_old_connections
+from django.db.models import F
+from django.db.models.signals import post_save
+
+from .models import Document, DocumentPage
+from .pdf_text import extract_pdf_pages
+from .search import update_page_search_vectors
+
+
+logger = logging.getLogger(__name__)
+
+# A single background thread per process runs the extraction after documents are uploaded
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='text-extraction')
+
+
+def get_pending_documents():
+    """
+    Get the documents whose stored file has changed since its text was last extracted.
+
+    Stored file names are content digests (see notes.storage.ContentAddressedStorage), so comparing the
+    current file name with the extracted one skips unchanged files without reading them.
+    """
+    return Document.objects.exclude(extracted_file=F('document'))
+
+
+def extract_document_text(batch_size=None, workers=None):
+    """
+    Extract the per-page text of all pending documents.
+
+    Documents are processed in batches. Within a batch, each distinct file is extracted only once, in a
+    process pool; documents sharing a file that was extracted before get the existing pages copied instead.
+    Files that are not PDFs, or that cannot be parsed, are recorded as extracted with no pages.
+
+    Args:
+        batch_size (int, optional): The number of documents per batch (default settings.NOTES_TEXT_EXTRACTION_BATCH_SIZE).
+        workers (int, optional): The number of worker processes (default settings.NOTES_TEXT_EXTRACTION_WORKERS).
+
+    Returns:
+        dict: The number of files extracted and copied, and the number of documents updated.
+    """
+    batch_size = batch_size or getattr(settings, 'NOTES_TEXT_EXTRACTION_BATCH_SIZE', 100)
+    workers = workers or getattr(settings, 'NOTES_TEXT_EXTRACTION_WORKERS', None) or os.cpu_count()
+    storage = Document._meta.get_field('document').storage
+    totals = {'extracted': 0, 'copied': 0, 'documents': 0}
+    last_pk = 0
+
+    # Spawned rather than forked workers: extraction may run from a background thread of a web worker,
+    # and notes.pdf_text does not need Django to be set up
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        while True:
+            batch = list(get_pending_documents().filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'document')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            documents_by_file = {}
+            for document_id, file_name in batch:
+                documents_by_file.setdefault(file_name, []).append(document_id)
+
+            # Documents with the same content extracted earlier
+            sources = dict(Document.objects.filter(extracted_file__in=documents_by_file).values_list('extracted_file', 'pk'))
+
+            futures = {}
+            for file_name, document_ids in documents_by_file.items():
+                if file_name in sources:
+                    copy_pages(sources[file_name], document_ids, file_name)
+                    totals['copied'] += 1
+                elif file_name.endswith('.pdf'):
+                    futures[pool.submit(extract_pdf_pages, storage.path(file_name))] = file_name
+                else:
+                    save_pages(document_ids, file_name, [])
+                totals['documents'] += len(document_ids)
+
+            for future in as_completed(futures):
+                file_name = futures[future]
+                try:
+                    pages = future.result()
+                except Exception:
+                    logger.exception('Extracting the text of %s failed.', file_name)
+                    pages = []
+                save_pages(documents_by_file[file_name], file_name, pages)
+                totals['extracted'] += 1
+
+    return totals
+
+
+def save_pages(document_ids, file_name, pages):
+    """
+    Replace the extracted pages of documents sharing one file.
+
+    Args:
+        document_ids (list): The ids of the documents.
+        file_name (str): The stored file name the text was extracted from.
+        pages (list): The text of each page, in page order. Blank pages are not stored.
+    """
+    with transaction.atomic():
+        DocumentPage.objects.filter(document_id__in=document_ids).delete()
+        DocumentPage.objects.bulk_create([
+            DocumentPage(document_id=document_id, page_number=page_number, text=text)
+            for document_id in document_ids
+            for page_number, text in enumerate(pages, start=1) if text.strip()
+        ], batch_size=500)
+        update_page_search_vectors(document_ids)
+        # A document whose file was replaced meanwhile stays pending
+        Document.objects.filter(pk__in=document_ids, document=file_name).update(extracted_file=file_name)
+
+
+def copy_pages(source_document_id, document_ids, file_name):
+    """
+    Give documents the pages already extracted for another document with the same file.
+    """
+    pages = dict(DocumentPage.objects.filter(document_id=source_document_id).values_list('page_number', 'text'))
+    page_count = max(pages, default=0)
+    save_pages(document_ids, file_name, [pages.get(page_number, '') for page_number in range(1, page_count + 1)])
+
+
+def queue_text_extraction(sender, instance, **kwargs):
+    """
+    Extract the text of a saved document in the background once the transaction commits.
+    """
+    if instance.extracted_file != instance.document.name:
+        transaction.on_commit(lambda: _executor.submit(_extract_in_background))
+
+
+def _extract_in_background():
+    close_old_connections()
+    try:
+        extract_document_text()
+    except Exception:
+        logger.exception('Extracting document text failed.')
+    finally:
+        close_old_connections()
+
+
+def connect_signals():
+    """
+    Extract the text of uploaded documents in the background when settings.NOTES_TEXT_EXTRACTION_IN_PROCESS
+    is enabled. Otherwise it is extracted by `python manage.py extract_document_text`.
+    """
+    if getattr(settings, 'NOTES_TEXT_EXTRACTION_IN_PROCESS', False):
+        post_save.connect(queue_text_extraction, sender=Document)
@@ -0,0 +1,198 @@
+import hashlib
+import os
+import shutil
+import uuid
+
+from django.core.files import File
+from django.db import transaction
+
+from .models import Document
+
+
+CHUNK_READ_SIZE = 64 * 1024
+
+
+class ChunkChecksumError(Exception):
+    """
+    Raised when a received chunk does not match the checksum sent by the client.
+    """
+
+
+class ChunkedUploadFile(File):
+    """
+    A fully received chunked upload, handed to the document storage on finalize.
+
+    It exposes temporary_file_path() so the storage can link the partial file into place instead of copying
+    it. The partial file itself is kept (keep_temporary_file), so a finalize that rolls back can be retried;
+    it is deleted once the document is committed (see delete_part_file_on_commit).
+    """
+    keep_temporary_file = True
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def get_part_path(upload):
+    """
+    Get the path of the partial file that the chunks of an upload are appended to.
+
+    The partial file lives in the document storage, next to the stored documents, so finalizing an upload
+    is a rename rather than a copy.
+
+    Args:
+        upload (DocumentUpload): The upload.
+
+    Returns:
+        str: The absolute path of the partial file.
+    """
+    storage = Document._meta.get_field('document').storage
+    return storage.path(f'notes/uploads/{upload.pk}.part')
+
+
+def create_part_file(upload):
+    """
+    Create the empty partial file for a new upload.
+    """
+    part_path = get_part_path(upload)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    open(part_path, 'wb').close()
+
+
+def delete_part_file(upload):
+    """
+    Delete the partial file of an upload if it still exists.
+    """
+    try:
+        os.remove(get_part_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def delete_part_file_on_commit(upload):
+    """
+    Delete the partial file of an upload once the current transaction commits.
+    """
+    part_path = get_part_path(upload)  # Resolved now: deleting the upload row clears its pk
+
+    def delete():
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+
+    transaction.on_commit(delete)
+
+
+def parse_checksum_header(header):
+    """
+    Parse an `Upload-Checksum: sha256 <hex digest>` header.
+
+    Args:
+        header (str or None): The header value.
+
+    Returns:
+        str or None: The expected hex digest, or None if no checksum was sent.
+
+    Raises:
+        ValueError: If the header is malformed or uses an unsupported algorithm.
+    """
+    if not header:
+        return None
+    algorithm, _, digest = header.strip().partition(' ')
+    if algorithm.lower() != 'sha256' or len(digest.strip()) != 64:
+        raise ValueError("Upload-Checksum must have the form 'sha256 <hex digest>'.")
+    return digest.strip().lower()
+
+
+def receive_chunk(upload, stream, expected_checksum=None):
+    """
+    Receive a chunk read from `stream` into a staging file next to the partial file of an upload.
+
+    The chunk is staged without holding any lock or transaction, however slowly the client sends it, and is
+    hashed while it is written. The caller appends it with append_chunk once the upload row is locked.
+
+    Args:
+        upload (DocumentUpload): The upload, as read before the chunk was received.
+        stream: A file-like object with the chunk bytes (e.g. the request stream).
+        expected_checksum (str, optional): The SHA-256 hex digest of the chunk.
+
+    Returns:
+        str: The path of the staging file. The caller must delete it.
+
+    Raises:
+        ValueError: If the chunk would exceed the declared size of the upload.
+        ChunkChecksumError: If the chunk does not match the checksum.
+    """
+    hasher = hashlib.sha256()
+    written = 0
+    chunk_path = f'{get_part_path(upload)}.{uuid.uuid4().hex}.chunk'
+
+    try:
+        with open(chunk_path, 'wb') as chunk_file:
+            while True:
+                data = stream.read(CHUNK_READ_SIZE)
+                if not data:
+                    break
+                written += len(data)
+                if upload.offset + written > upload.size:
+                    raise ValueError('The chunk exceeds the declared size of the upload.')
+                hasher.update(data)
+                chunk_file.write(data)
+
+        if expected_checksum is not None and hasher.hexdigest() != expected_checksum:
+            raise ChunkChecksumError('The chunk does not match the provided checksum.')
+    except BaseException:
+        os.remove(chunk_path)
+        raise
+
+    return chunk_path
+
+
+def append_chunk(upload, chunk_path):
+    """
+    Append a received chunk (see receive_chunk) to the partial file of an upload at its current offset.
+
+    This is a local file copy, so it is quick enough to run while the upload row is locked. The caller is
+    responsible for locking the upload row, checking the offset and saving the new offset.
+
+    Args:
+        upload (DocumentUpload): The locked upload.
+        chunk_path (str): The path of the staging file.
+
+    Returns:
+        int: The number of bytes appended.
+
+    Raises:
+        ValueError: If the chunk would exceed the declared size of the upload.
+    """
+    written = os.path.getsize(chunk_path)
+    if upload.offset + written > upload.size:
+        raise ValueError('The chunk exceeds the declared size of the upload.')
+
+    with open(get_part_path(upload), 'r+b') as part_file, open(chunk_path, 'rb') as chunk_file:
+        part_file.seek(upload.offset)
+        shutil.copyfileobj(chunk_file, part_file, CHUNK_READ_SIZE)
+        part_file.truncate(upload.offset + written)
+
+    return written
+
+
+def get_file_checksum(upload):
+    """
+    Compute the SHA-256 hex digest of the partial file of an upload.
+    """
+    hasher = hashlib.sha256()
+    with open(get_part_path(upload), 'rb') as part_file:
+        for data in iter(lambda: part_file.read(CHUNK_READ_SIZE), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def open_completed_upload(upload):
+    """
+    Open a fully received upload as a file that can be assigned to Document.document.
+
+    Returns:
+        ChunkedUploadFile: The open file, named after the original file name.
+    """
+    return ChunkedUploadFile(open(get_part_path(upload), 'rb'), name=upload.filename)
@@ -1,22 +1,40 @@
+import io
+import os
+
 import requests
 
 
-from rest_framework import viewsets, status, authentication, permissions, serializers, mixins, response
+from rest_framework import viewsets, status, permissions, serializers, mixins, response
 from rest_framework.response import Response
 from rest_framework.decorators import action, parser_classes
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
 
-from django.http import FileResponse
+from django.contrib.postgres.search import SearchQuery, SearchRank
 from django.shortcuts import get_object_or_404
 from django.http import Http404
-from django.db.models import Q, QuerySet
+from django.db import IntegrityError, transaction
+from django.db.models import F, Prefetch, Q
+from django.db.models.functions import Lower
 from django.urls import reverse
 from django.conf import settings
 
 
-from .models import Category, Document, Topic
-from .serializers import CategorySerializer, DocumentSerializer, TopicSerializer
+from accounts.authentication import CachedTokenAuthentication
+
+from .models import Category, Document, DocumentPage, DocumentUpload, Topic
+from .downloads import serve_document
+from .search import get_search_config
+from .serializers import (
+    CategoryBulkCreateSerializer, CategorySerializer, DocumentSerializer, DocumentUploadSerializer, TopicCreateSerializer,
+    TopicSerializer,
+)
+from .url_templates import URLTemplate
+from .uploads import (
+    ChunkChecksumError, append_chunk, create_part_file, delete_part_file_on_commit, get_file_checksum,
+    open_completed_upload, parse_checksum_header, receive_chunk,
+)
 
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
@@ -25,14 +43,26 @@ class CategoryViewSet(viewsets.ModelViewSet):
     # Custom action to handle bulk creation of categories
     @action(detail=False, methods=['post'])
     def bulk_create(self, request):
-        serializer = self.get_serializer(data=request.data, many=True) # many=True: This parameter specifies that the data you're passing is a list of items
+        serializer = CategoryBulkCreateSerializer(data=request.data, many=True) # many=True: This parameter specifies that the data you're passing is a list of items
         serializer.is_valid(raise_exception=True)
-        self.perform_bulk_create(serializer)
-        return Response(serializer.data)
+        return Response(self.perform_bulk_create(serializer))
 
     # Custom method to perform the bulk creation
     def perform_bulk_create(self, serializer):
-        serializer.save()
+        """
+        Insert the validated categories with one bulk insert, skipping names that already exist.
+
+        Args:
+            serializer: The validated bulk create serializer.
+
+        Returns:
+            list: The id and name of each category, with status 'created' or 'existing'.
+        """
+        names = [item['name'].strip() for item in serializer.validated_data]
+        return [
+            {'id': category.id, 'name': category.name, 'status': 'created' if created else 'existing'}
+            for category, created in Category.objects.bulk_get_or_create(names)
+        ]
     
     # Custom action to delete a category by name
     @action(detail=False, methods=['delete'])
@@ -48,17 +78,23 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['delete'])
     def bulk_delete(self, request):
         category_names = request.data.get('category_names', [])
-        deleted_categories = []
+        # One case-insensitive match and one set-based delete, in a single transaction
+        deleted_categories, missing_categories = Category.objects.delete_by_names(category_names)
 
-        for name in category_names:
-            try:
-                category = Category.objects.get(Q(name__iexact=name))
-                category.delete()
-                deleted_categories.append(name)
-            except Category.DoesNotExist:
-                pass
+        return Response({
+            'message': f'Categories {", ".join(deleted_categories)} have been successfully deleted',
+            'deleted': deleted_categories,
+            'not_found': missing_categories,
+        }, status=status.HTTP_200_OK)
 
-        return Response({'message': f'Categories {", ".join(deleted_categories)} have been successfully deleted'}, status=status.HTTP_200_OK)
+
+class DocumentSearchPagination(PageNumberPagination):
+    """
+    Page number pagination for ranked search results.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
 class DocumentViewSet(viewsets.ModelViewSet):
@@ -68,7 +104,7 @@ class DocumentViewSet(viewsets.ModelViewSet):
     Provides CRUD operations for documents along with additional actions like downloading and retrieving URLs.
     """
 
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     queryset = Document.objects.all()
@@ -97,20 +133,37 @@ class DocumentViewSet(viewsets.ModelViewSet):
         try:
             return super().create(request, *args, **kwargs)
         except ValidationError as e:
-            if 'existing_document_title' in e.detail:
-                existing_document_title = e.detail['existing_document_title']
-                existing_document = Document.objects.get(title=existing_document_title)
-                document_download_url_by_id = reverse('download-document-by-id', args=[existing_document.pk])
-                document_download_url_by_title = reverse('download-document-by-title', args=[existing_document.title])
-                response_data = {
-                    'title_error': str(e.detail['title']),
-                    'existing_document_download_url_by_id': request.build_absolute_uri(document_download_url_by_id),
-                    'existing_document_download_url_by_title': request.build_absolute_uri(document_download_url_by_title),
-                }
-                return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
-            else:
+            response = self.duplicate_title_response(request, e)
+            if response is None:
                 raise e
-            
+            return response
+
+    def duplicate_title_response(self, request, error):
+        """
+        Build the response for a document upload rejected because of a duplicate title.
+
+        Args:
+            request: The HTTP request.
+            error (ValidationError): The validation error raised while saving the document.
+
+        Returns:
+            Response or None: The response pointing to the existing document, or None if the error is not a
+            duplicate title error.
+        """
+        if 'existing_document_title' not in error.detail:
+            return None
+        # The presave signal reports the existing document, so it does not have to be fetched again
+        existing_document_title = str(error.detail['existing_document_title'])
+        existing_document_id = int(error.detail['existing_document_id'])
+        document_download_url_by_id = reverse('download-document-by-id', args=[existing_document_id])
+        document_download_url_by_title = reverse('download-document-by-title', args=[existing_document_title])
+        response_data = {
+            'title_error': str(error.detail['title']),
+            'existing_document_download_url_by_id': request.build_absolute_uri(document_download_url_by_id),
+            'existing_document_download_url_by_title': request.build_absolute_uri(document_download_url_by_title),
+        }
+        return Response(response_data, status=status.HTTP_400_BAD_REQUEST)
+
     def perform_create(self, serializer):
         """
         Perform the creation of a document instance.
@@ -126,19 +179,157 @@ class DocumentViewSet(viewsets.ModelViewSet):
         Returns:
             None
         """
-        category_names = self.request.data.get('categories', '').split(',')
-        category_names = [name.strip() for name in category_names if name.strip()]
-        categories = []
-        for name in category_names:
-            name_lower = name.lower()
-            category, created = Category.objects.get_or_create(name__iexact=name_lower)
-            if created:
-                category.name = name
-                category.save()
-            categories.append(category)
-                
+        self.save_document(serializer, self.request.data.get('categories', ''))
+
+    def save_document(self, serializer, categories):
+        """
+        Save a validated document serializer with its categories and uploader.
+
+        Args:
+            serializer: The validated serializer for document creation.
+            categories (str): Comma-separated category names; missing categories are created.
+        """
+        category_names = [name.strip() for name in categories.split(',') if name.strip()]
+        # Resolve all categories at once: one lookup, one bulk insert for the missing ones
+        categories = Category.objects.get_or_create_by_names(category_names)
+
         serializer.save(uploaded_by=self.request.user, categories=categories)
 
+    @action(detail=False, methods=['post'], url_path='uploads', parser_classes=[JSONParser, FormParser, MultiPartParser])
+    def start_upload(self, request):
+        """
+        Start a resumable, chunked document upload.
+
+        The request declares the file name and size (and optionally the SHA-256 checksum of the whole file)
+        along with the details of the document, and of the topic, to create once all chunks are received.
+
+        Args:
+            request: The HTTP request.
+
+        Returns:
+            Response: The upload id and the offset to send the first chunk at.
+        """
+        serializer = DocumentUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(uploaded_by=request.user)
+        create_part_file(upload)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get', 'put'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})', parser_classes=[])
+    def upload_chunk(self, request, upload_id=None):
+        """
+        Report the progress of a chunked upload (GET) or append the next chunk to it (PUT).
+
+        A chunk is sent as the raw request body with an `Upload-Offset` header that must match the number of
+        bytes received so far, and an optional `Upload-Checksum: sha256 <hex digest>` header for the chunk.
+        A mismatching offset is answered with 409 Conflict and the current offset, so the client can resume.
+
+        Args:
+            request: The HTTP request.
+            upload_id: The id of the upload.
+
+        Returns:
+            Response: The upload details with the current offset, or error details.
+        """
+        if request.method == 'GET':
+            upload = get_object_or_404(DocumentUpload, pk=upload_id, uploaded_by=request.user)
+            return Response(DocumentUploadSerializer(upload).data)
+
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            checksum = parse_checksum_header(request.headers.get('Upload-Checksum'))
+        except KeyError:
+            return Response({'error': 'The Upload-Offset header is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = get_object_or_404(DocumentUpload, pk=upload_id, uploaded_by=request.user)
+        if offset != upload.offset:
+            return self.offset_conflict_response(upload)
+
+        # The chunk is received from the client before the row is locked, so a slow client holds no
+        # database lock or transaction
+        try:
+            chunk_path = receive_chunk(upload, request.stream or io.BytesIO(), checksum)
+        except (ValueError, ChunkChecksumError) as e:
+            return Response({'error': str(e), 'offset': upload.offset}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                # The row lock serializes concurrent chunks of the same upload
+                upload = get_object_or_404(DocumentUpload.objects.select_for_update(), pk=upload_id, uploaded_by=request.user)
+                if offset != upload.offset:
+                    return self.offset_conflict_response(upload)
+                try:
+                    upload.offset += append_chunk(upload, chunk_path)
+                except ValueError as e:
+                    return Response({'error': str(e), 'offset': upload.offset}, status=status.HTTP_400_BAD_REQUEST)
+                upload.save(update_fields=['offset', 'updated_at'])
+        finally:
+            os.remove(chunk_path)
+
+        return Response(DocumentUploadSerializer(upload).data)
+
+    @staticmethod
+    def offset_conflict_response(upload):
+        return Response(
+            {'error': 'Upload-Offset does not match the received bytes.', 'offset': upload.offset},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    @action(detail=False, methods=['post'], url_path=r'uploads/(?P<upload_id>[0-9a-f-]{36})/finalize', parser_classes=[JSONParser, FormParser, MultiPartParser])
+    def finalize_upload(self, request, upload_id=None):
+        """
+        Finalize a fully received chunked upload into a document, and a topic if one was requested.
+
+        The partial file is linked into the document storage rather than copied, and only deleted once the
+        document is committed, so a finalize that fails can be retried. A `title` may be sent to replace the
+        one given when the upload was started, e.g. after a duplicate title error.
+
+        Args:
+            request: The HTTP request.
+            upload_id: The id of the upload.
+
+        Returns:
+            Response: The created document details, or error details.
+        """
+        with transaction.atomic():
+            upload = get_object_or_404(DocumentUpload.objects.select_for_update(), pk=upload_id, uploaded_by=request.user)
+            if upload.offset != upload.size:
+                return Response(
+                    {'error': 'The upload is incomplete.', 'offset': upload.offset, 'size': upload.size},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if upload.checksum and get_file_checksum(upload) != upload.checksum:
+                return Response({'error': 'The uploaded file does not match the provided checksum.'}, status=status.HTTP_400_BAD_REQUEST)
+
+            title = request.data.get('title', upload.title)
+            file = open_completed_upload(upload)
+            try:
+                serializer = self.get_serializer(data={'document': file, 'title': title, 'author': upload.author})
+                serializer.is_valid(raise_exception=True)
+                self.save_document(serializer, upload.categories)
+            except ValidationError as e:
+                response = self.duplicate_title_response(request, e)
+                if response is None:
+                    raise e
+                return response
+            finally:
+                file.close()
+
+            if upload.topic_name:
+                Topic.objects.create(
+                    name=upload.topic_name,
+                    start_page=upload.start_page,
+                    end_page=upload.end_page,
+                    document=serializer.instance,
+                    uploaded_by=request.user,
+                )
+            delete_part_file_on_commit(upload)
+            upload.delete()
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def delete(self, request, *args, **kwargs):
         """
         Delete a document instance.
@@ -184,32 +375,34 @@ class DocumentViewSet(viewsets.ModelViewSet):
         """
         Download a document by its ID.
 
+        Supports byte ranges and conditional requests (see notes/downloads.py).
+
         Args:
             request: The HTTP request.
             pk: The primary key of the document.
 
         Returns:
-            FileResponse: The file response for downloading the document.
+            HttpResponse: The response for downloading the document.
         """
         document = get_object_or_404(Document, pk=pk)
-        response = FileResponse(document.document.open('rb'), as_attachment=True)
-        return response
+        return serve_document(request, document)
     
     @action(detail=False, methods=['get'])
     def download_document_by_title(self, request, title=None):
         """
         Download a document by its title.
 
+        Supports byte ranges and conditional requests (see notes/downloads.py).
+
         Args:
             request: The HTTP request.
             title: The title of the document.
 
         Returns:
-            FileResponse: The file response for downloading the document.
+            HttpResponse: The response for downloading the document.
         """
         document = get_object_or_404(Document, title=title)
-        response = FileResponse(document.document.open('rb'), as_attachment=True)
-        return response
+        return serve_document(request, document)
     
     @action(detail=False, methods=['get'])
     def document_urls(self, request):
@@ -233,41 +426,125 @@ class DocumentViewSet(viewsets.ModelViewSet):
             ids_list = ids.split(',')
             queryset = queryset.filter(pk__in=ids_list)
         if titles:
-            titles_list = titles.split(',')
-            title_queries = Q()
-            for title in titles_list:
-                title_queries |= Q(title__iexact=title.strip())
-            queryset = queryset.filter(title_queries)
-
-        document_urls = []
-        for document in queryset:
-            document_url = reverse('document-detail', args=[document.pk])
-            document_download_url_by_id = reverse('download-document-by-id', args=[document.pk])
-            document_download_url_by_title = reverse('download-document-by-title', args=[document.title])
-
-            document_urls.append({
-                'title': document.title,
-                'url': document_url,
-                'download_url_by_id': request.build_absolute_uri(document_download_url_by_id),
-                'download_url_by_title': request.build_absolute_uri(document_download_url_by_title),
-            })
+            # A single `lower(title) IN (...)` lookup, backed by notes_document_title_lower_idx
+            titles_list = {title.strip().lower() for title in titles.split(',') if title.strip()}
+            queryset = queryset.annotate(title_lower=Lower('title')).filter(title_lower__in=titles_list)
+
+        # Resolve each route once and only format the per-document part in the loop
+        document_url = URLTemplate(request, 'document-detail', absolute=False)
+        download_url_by_id = URLTemplate(request, 'download-document-by-id')
+        download_url_by_title = URLTemplate(request, 'download-document-by-title')
+
+        document_urls = [
+            {
+                'title': title,
+                'url': document_url.format(pk),
+                'download_url_by_id': download_url_by_id.format(pk),
+                'download_url_by_title': download_url_by_title.format(title),
+            }
+            for pk, title in queryset.values_list('pk', 'title')
+        ]
 
         return Response(document_urls)
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Search documents by their title, topics, categories, author and extracted page text.
+
+        Uses Postgres full-text search over Document.search_vector (see notes/search.py). The `q` query
+        parameter accepts web search syntax (quoted phrases, `or`, `-excluded`). Results are ranked by
+        relevance and paginated, and can be filtered with `categories` (comma-separated category names)
+        and `uploaded_by` (a user id).
+
+        Args:
+            request: The HTTP request.
+
+        Returns:
+            Response: A page of matching documents with their rank, matching page numbers and download URLs.
+        """
+        query_text = request.query_params.get('q', '').strip()
+        if not query_text:
+            return Response({'error': 'The q query parameter is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        query = SearchQuery(query_text, search_type='websearch', config=get_search_config())
+        matching_pages = DocumentPage.objects.filter(search_vector=query)
+        documents = (
+            # Documents whose details match, or with matching text on one of their extracted pages
+            Document.objects.filter(Q(search_vector=query) | Q(pk__in=matching_pages.values('document_id')))
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-created_at', '-pk')
+            .only('id', 'title', 'author', 'uploaded_by', 'created_at')
+            .prefetch_related(Prefetch('categories', queryset=Category.objects.only('id', 'name')))
+        )
+
+        categories = request.query_params.get('categories')
+        if categories:
+            category_names = [name.strip().lower() for name in categories.split(',') if name.strip()]
+            category_ids = Category.objects.annotate(name_lower=Lower('name')).filter(name_lower__in=category_names).values('pk')
+            # A subquery on the link table instead of a join, so documents in several categories are not repeated
+            documents = documents.filter(pk__in=Document.categories.through.objects.filter(category__in=category_ids).values('document_id'))
+
+        uploaded_by = request.query_params.get('uploaded_by')
+        if uploaded_by:
+            if not uploaded_by.isdigit():
+                return Response({'error': 'uploaded_by must be a user id.'}, status=status.HTTP_400_BAD_REQUEST)
+            documents = documents.filter(uploaded_by_id=uploaded_by)
+
+        paginator = DocumentSearchPagination()
+        page = paginator.paginate_queryset(documents, request, view=self)
+
+        # The pages of the listed documents whose text matches, in one query
+        page_numbers = {}
+        for document_id, page_number in (matching_pages.filter(document_id__in=[document.pk for document in page])
+                                         .order_by('page_number').values_list('document_id', 'page_number')):
+            page_numbers.setdefault(document_id, []).append(page_number)
+
+        document_url = URLTemplate(request, 'document-detail', absolute=False)
+        download_url_by_id = URLTemplate(request, 'download-document-by-id')
+        results = [
+            {
+                'id': document.pk,
+                'title': document.title,
+                'author': document.author,
+                'uploaded_by': document.uploaded_by_id,
+                'created_at': document.created_at,
+                'categories': [category.name for category in document.categories.all()],
+                'rank': document.rank,
+                'pages': page_numbers.get(document.pk, []),
+                'url': document_url.format(document.pk),
+                'download_url_by_id': download_url_by_id.format(document.pk),
+            }
+            for document in page
+        ]
+        return paginator.get_paginated_response(results)
+
     
 
+class TopicPagination(PageNumberPagination):
+    """
+    Page number pagination for topic listings: one count query and one query for the page.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+
 class TopicViewSet(viewsets.ModelViewSet):
     """
     A viewset for managing topics.
 
     Provides CRUD operations for topics, along with additional actions like updating and deleting topics.
     """
-    authentication_classes = [authentication.TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
-    queryset = Topic.objects.all()
+    # TopicSerializer only outputs the document and uploader ids, which are read from the topic row itself, so
+    # the Document (with its search vector) and User rows are not joined
+    queryset = Topic.objects.order_by('id')
     serializer_class = TopicSerializer
     parser_classes = [MultiPartParser, FormParser]
+    pagination_class = TopicPagination
 
     def get_serializer_context(self):
         """
@@ -280,6 +557,10 @@ class TopicViewSet(viewsets.ModelViewSet):
         """
         Create a new topic along with an optional document.
         If a document file is not present in the request, a document_title for an existing document should be provided.
+
+        The topic fields are validated before anything is written. The document is resolved once and the topic
+        is inserted in the same transaction; a duplicate topic name for the document is rejected by the
+        notes_topic_document_name_uniq constraint instead of a separate existence check.
         
         Args:
             request: The HTTP request object.
@@ -287,89 +568,75 @@ class TopicViewSet(viewsets.ModelViewSet):
         Returns:
             Response: The HTTP response object.
         """
+        uploaded_document = request.data.get('uploaded_document')
+        document_title = request.data.get('document_title') or None
+        if uploaded_document is None and document_title is None:
+            return Response({'error': 'A document or title for an existing document has to be provided'}, status=status.HTTP_400_BAD_REQUEST)
+
         # Create topic data
         topic_data = {
             'name': request.data.get('name'),  # Assuming 'name' is a required field for topics
             'start_page': request.data.get('start_page', None),
             'end_page': request.data.get('end_page', None),
-            'uploaded_by': request.user.id,
         }
+        serializer = TopicCreateSerializer(data=topic_data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        if 'uploaded_document' in request.data:
-            # Prepare the data for document creation
-            document_data = {
-                'document': request.data['uploaded_document'],
-                'uploaded_by': request.user.id,
-            }
-
-            # Call the create_document method to upload the document
-            document = self.create_document(request, document_data)
-            # Check if the document was created successfully
-            if document:
-                topic_data['document'] = document.id
+        with transaction.atomic():
+            if uploaded_document is not None:
+                # Call the create_document method to upload the document
+                document = self.create_document(request, uploaded_document, document_title)
+                if document is None:
+                    # If there was an error during document creation, return an error response
+                    return Response({'error': 'Document creation failed.'}, status=status.HTTP_400_BAD_REQUEST)
             else:
-                # If there was an error during document creation, return an error response
-                return Response({'error': 'Document creation failed.'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        elif 'uploaded_document' not in request.data and 'document_title' not in request.data:
-            return Response({'error': 'A document or title for an existing document has to be provided'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        else:
-            document_title = request.data.get('document_title', None)
-            if document_title:
-                existing_document = Document.objects.filter(title=document_title).first()
-                if existing_document:
-                    topic_data['document'] = existing_document.id
-                else:
+                document = Document.objects.filter(title=document_title).only('pk').first()
+                if document is None:
                     return Response({'not found': 'Document with this title does not exist'}, status=status.HTTP_404_NOT_FOUND)
 
-        existing_topic = Topic.objects.filter(name=topic_data['name'], document=topic_data['document']).first()
-        if existing_topic:
-            raise ValidationError({'exists': 'A topic with the same name already exists for the provided document.'})
-        # Create the topic
-        serializer = TopicSerializer(data=topic_data, context={'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
+            # Create the topic; only its insert can violate notes_topic_document_name_uniq. The error rolls back
+            # a document created above, and its stored file is left for delete_orphaned_document_files.
+            try:
+                with transaction.atomic():
+                    serializer.save(document=document, uploaded_by=request.user)
+            except IntegrityError:
+                raise ValidationError({'exists': 'A topic with the same name already exists for the provided document.'})
 
-    def create_document(self, request, document_data):
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def create_document(self, request, uploaded_document, document_title=None):
         """
         Create a new document or retrieve an existing document based on the provided data.
 
         Args:
             request: The HTTP request object.
-            document_data: Data for creating the document.
+            uploaded_document: The uploaded document file.
+            document_title (str, optional): The title of the document. If a document with this title exists, it is
+                used instead of the uploaded file.
 
         Returns:
             Document or None: The created or existing Document object, or None if creation fails.
         """
-        # Check if a document title is provided in the request
-        document_title = request.data.get('document_title', None)
+        document_data = {'document': uploaded_document}
         if document_title:
-            existing_document = Document.objects.filter(title=document_title).first()
+            existing_document = Document.objects.filter(title=document_title).only('pk').first()
             if existing_document:
                 return existing_document  # Return the existing document
-            else:
-                document_data['title'] = document_title
-        
+            document_data['title'] = document_title
+
+        # Create an instance of the DocumentSerializer and call save to create the document
+        serializer = DocumentSerializer(data=document_data, context={'request': request})
+        if not serializer.is_valid():
+            return None
         try:
-            # Create an instance of the DocumentSerializer and call save to create the document
-            serializer = DocumentSerializer(data=document_data, context={'request': request})
-            if serializer.is_valid():
-                serializer.save()
-                return serializer.instance
-            
-        except Exception as e:
-            # Check if existing_document_title is in the error and use it to search the database for that document
-            if 'existing_document_title' in str(e):
-                existing_document_title = e.detail['existing_document_title']
-                existing_document = Document.objects.filter(title=existing_document_title).first()
-                if existing_document:
-                    return existing_document  
-            return None 
+            return serializer.save(uploaded_by=request.user)
+        except ValidationError as e:
+            # The presave signal found a document with the same title (derived from the file name) and reports
+            # its id, so it can be used without fetching it again
+            if 'existing_document_id' in e.detail:
+                return Document(pk=int(e.detail['existing_document_id']), title=str(e.detail['existing_document_title']))
+            return None
 
     
     
@@ -398,12 +665,12 @@ class TopicViewSet(viewsets.ModelViewSet):
             topic = self.get_object()
         except ValueError:
             # If it's not numeric, consider it a topic name
-            topics = Topic.objects.filter(name=lookup_value)
-            if not topics.exists():
+            topics = list(self.get_queryset().filter(name=lookup_value))
+            if not topics:
                 raise Http404("Topic not found.")
             topic = topics
 
-        serializer = self.get_serializer(topic, many=isinstance(topic, QuerySet))
+        serializer = self.get_serializer(topic, many=isinstance(topic, list))
         return Response(serializer.data)
     
     @action(detail=False, methods=['put'])
@@ -1,11 +1,12 @@
 from rest_framework import serializers
 from .models import Student
-from accounts.serializers import UserProfileSerializer  
+from accounts.serializers import AdminInfoListSerializer, UserProfileSerializer
 
 class StudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = '__all__'
+        list_serializer_class = AdminInfoListSerializer  # Loads the admin info of all the profiles at once
 
     user_name = serializers.ReadOnlyField(source='user.username')
     course_name = serializers.ReadOnlyField(source='course.name')
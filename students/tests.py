@@ -1,3 +1,59 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from notes.models import Category, Document
+from notes.tests import MediaRootTestCase
+from students.models import Student
+
+
+class StudentDocumentsTestCase(MediaRootTestCase):
+    """
+    Test case for StudentViewSet.student_documents.
+    """
+    def setUp(self):
+        super().setUp()
+        self.student = Student.objects.create(user=self.user)
+        self.client = APIClient()
+        self.url = reverse('student-documents', args=[self.student.pk])
+
+        category = Category.objects.create(name='Mathematics')
+        self.documents = []
+        for number in range(5):
+            document = Document.objects.create(title=f'Lecture {number}', document=SimpleUploadedFile(f'lecture{number}.pdf', f'%PDF {number}'.encode()), uploaded_by=self.user)
+            document.categories.add(category)
+            self.documents.append(document)
+
+    def test_student_documents_pages(self):
+        """
+        Test that documents are cursor paginated with a constant number of queries.
+        """
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url, {'page_size': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['document_title'] for item in response.data['results']], ['Lecture 0', 'Lecture 1', 'Lecture 2'])
+        self.assertEqual(response.data['results'][0]['document_categories'], [{'id': self.documents[0].categories.get().pk, 'name': 'Mathematics'}])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['document_title'] for item in response.data['results']], ['Lecture 3', 'Lecture 4'])
+        self.assertIsNone(response.data['next'])
+
+    def test_student_documents_since(self):
+        """
+        Test that `since` only returns documents uploaded after it.
+        """
+        Document.objects.filter(pk=self.documents[4].pk).update(created_at=self.documents[3].created_at + timedelta(hours=1))
+        since = (self.documents[3].created_at + timedelta(minutes=1)).isoformat()
+
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual([item['document_title'] for item in response.data['results']], ['Lecture 4'])
+
+        response = self.client.get(self.url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'since': '2024-02-30T00:00'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
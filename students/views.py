@@ -1,14 +1,30 @@
-from rest_framework import viewsets
+from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 
-from django.urls import reverse
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from .models import Student
 from .serializers import StudentSerializer
 
-from notes.models import Document 
-from notes.serializers import DocumentSerializer, CategorySerializer
+from notes.models import Category, Document
+from notes.serializers import CategorySerializer
+from notes.url_templates import URLTemplate
+
+
+class StudentDocumentsPagination(CursorPagination):
+    """
+    Cursor pagination over a student's documents keyed on (created_at, id), oldest first,
+    so new uploads are always appended at the end and clients can keep syncing from the last cursor.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('created_at', 'id')
+
 
 class StudentViewSet(viewsets.ModelViewSet):
     queryset = Student.objects.all()
@@ -16,25 +32,55 @@ class StudentViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['GET'])
     def student_documents(self, request, pk=None):
+        """
+        List the documents uploaded by a student with their download links and categories.
+
+        Pages are cursor paginated on (created_at, id). The optional `since` query parameter (an ISO 8601
+        datetime) only returns documents uploaded after it, so clients can sync incrementally.
+
+        Args:
+            request: The HTTP request.
+            pk: The primary key of the student.
+
+        Returns:
+            Response: A page of documents with the next and previous page links.
+        """
         student_profile = self.get_object()
-        student_documents = Document.objects.filter(uploaded_by=student_profile.user)
+        student_documents = (
+            Document.objects.filter(uploaded_by_id=student_profile.user_id)
+            .only('id', 'title', 'author', 'created_at')
+            .prefetch_related(Prefetch('categories', queryset=Category.objects.only('id', 'name')))
+        )
+
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since_datetime = parse_datetime(since)
+            except ValueError:
+                # Well formed but not a real date, e.g. 2024-02-30T00:00
+                since_datetime = None
+            if since_datetime is None:
+                return Response({'error': 'since must be an ISO 8601 datetime.'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(since_datetime):
+                since_datetime = timezone.make_aware(since_datetime)
+            student_documents = student_documents.filter(created_at__gt=since_datetime)
+
+        paginator = StudentDocumentsPagination()
+        page = paginator.paginate_queryset(student_documents, request, view=self)
 
         # Create a list of download links for the student's documents
+        download_url = URLTemplate(request, 'download-document-by-id')
         download_links = []
-        for document in student_documents:
-            category_data = CategorySerializer(document.categories.all(), many=True).data
+        for document in page:
             download_links.append({
                 'document_title': document.title,
-                'document_download_url': request.build_absolute_uri(
-                    reverse('download-document-by-id', args=[document.pk])
-                ),
+                'document_download_url': download_url.format(document.pk),
                 'document_author': document.author,
-                'document_categories': category_data,
+                'document_categories': CategorySerializer(document.categories.all(), many=True).data,
                 'document_created_at': document.created_at,
-
             })
 
-        return Response(download_links)
+        return paginator.get_paginated_response(download_links)
     
 
     @action(detail=True, methods=['GET'])